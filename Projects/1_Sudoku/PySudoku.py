@@ -1,55 +1,187 @@
 import sys, os, random, pygame
-sys.path.append(os.path.join("objects"))
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, "objects"))
 import SudokuSquare
 from utils import *
 from GameResources import *
 
 
-def play(values, result, history):
-    assignments = reconstruct(result, history)
+SIZE = WIDTH, HEIGHT = 700, 700
+BACKGROUND = os.path.join(HERE, "images", "sudoku-board-bare.jpg")
+
+
+def square_position(x, y):
+    """Return the pixel offset of the square in column x and row y of the board image"""
+    if x in (0, 1, 2):  startX = (x * 57) + 38
+    if x in (3, 4, 5):  startX = (x * 57) + 99
+    if x in (6, 7, 8):  startX = (x * 57) + 159
+
+    if y in (0, 1, 2):  startY = (y * 57) + 35
+    if y in (3, 4, 5):  startY = (y * 57) + 100
+    if y in (6, 7, 8):  startY = (y * 57) + 165
+    return startX, startY
+
+
+class Renderer:
+    """Draws a board once and then redraws only the squares that change
+
+    Attributes
+    ----------
+    surface : pygame.Surface
+        The surface the board is drawn on; the display when playing, or an
+        offscreen surface when rendering headless
+
+    values : dict
+        The board as currently drawn
+    """
+    def __init__(self, values, surface=None):
+        """
+        Parameters
+        ----------
+        values(dict)
+            a dictionary of the form {'box_name': '123456789', ...}
+
+        surface(pygame.Surface)
+            the surface to draw on; an offscreen surface is created if None
+        """
+        self.surface = surface if surface is not None else pygame.Surface(SIZE)
+        self.background = pygame.image.load(BACKGROUND)
+        if pygame.display.get_surface() is not None:
+            self.background = self.background.convert()
+        self.values = dict(values)
+        self.surface.blit(self.background, (0, 0))
+        for box in boxes:
+            self.draw_square(box)
+
+    def draw_square(self, box):
+        """Draw one square from `values` and return the rectangle that changed"""
+        y, x = rows.index(box[0]), cols.index(box[1])
+        startX, startY = square_position(x, y)
+        string_number = self.values[box]
+        if len(string_number) > 1 or string_number == '' or string_number == '.':
+            number = None
+        else:
+            number = int(string_number)
+        square = SudokuSquare.SudokuSquare(number, startX, startY, "N", x, y)
+        # restore the background first, since the corners of a square are transparent
+        rect = pygame.Rect(startX, startY, 45, 40)
+        self.surface.blit(self.background, rect, rect)
+        return square.draw(self.surface)
+
+    def assign(self, box, value):
+        """Set the value of a box and return the rectangle to update, or None if nothing changed"""
+        if self.values[box] == value:
+            return None
+        self.values[box] = value
+        return self.draw_square(box)
+
+
+def _to_image(surface):
+    """Convert a surface to a Pillow image"""
+    from PIL import Image
+    tobytes = getattr(pygame.image, 'tobytes', None) or pygame.image.tostring
+    return Image.frombytes("RGB", surface.get_size(), tobytes(surface, 'RGB'))
+
+
+def _save_png(surface, filename):
+    """Save a surface as a PNG file, using Pillow's faster compression setting if it is installed"""
+    try:
+        _to_image(surface).save(filename, compress_level=1)
+    except ImportError:
+        pygame.image.save(surface, filename)
+
+
+def render(values, result, history, frames=None, gif=None, duration=200, every=1):
+    """Render the replay of a solution without a display
+
+    The initial board is drawn once, and each assignment from `reconstruct`
+    only redraws the square it changes. The steps that change the board are
+    written as numbered PNG frames and/or appended to an animated GIF.
+
+    Parameters
+    ----------
+    values(dict)
+        the starting board
+
+    result(dict)
+        the solution found while recording the history
+
+    history(AssignmentLog)
+        the assignments recorded while solving
+
+    frames(string)
+        a directory to write frame_00000.png, frame_00001.png, ... to
+
+    gif(string)
+        a file to write an animated GIF to; this needs the Pillow package
+
+    duration(int)
+        the time each frame of the GIF is shown, in milliseconds
+
+    every(int)
+        only every `every`-th step is written, to shorten long traces; the
+        first and the final board are always written
+
+    Returns
+    -------
+    int
+        The number of frames written
+    """
+    current = dict(values)
+    steps = [None]
+    for box, value in reconstruct(result, history):
+        if current[box] != value:
+            current[box] = value
+            steps.append((box, value))
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
     pygame.init()
+    if frames is not None:
+        os.makedirs(frames, exist_ok=True)
+    images = []
+    renderer = Renderer(values)
+    dirty = []
+    count = 0
+    for i, step in enumerate(steps):
+        if step is not None:
+            dirty.append(renderer.assign(*step))
+        if i % every and i != len(steps) - 1:
+            continue
+        if frames is not None:
+            _save_png(renderer.surface, os.path.join(frames, "frame_{:05d}.png".format(count)))
+        if gif is not None and not images:
+            images.append(_to_image(renderer.surface).quantize())
+        elif gif is not None:
+            # only the changed squares are converted to the palette of the first frame
+            image = images[-1].copy()
+            for rect in dirty:
+                square = _to_image(renderer.surface.subsurface(rect))
+                image.paste(square.quantize(palette=images[0], dither=0), rect.topleft)
+            images.append(image)
+        dirty = []
+        count += 1
 
-    size = width, height = 700, 700
-    screen = pygame.display.set_mode(size)
+    if gif is not None:
+        images[0].save(gif, save_all=True, append_images=images[1:], duration=duration)
+    return count
 
-    background_image = pygame.image.load("./images/sudoku-board-bare.jpg").convert()
+
+def play(values, result, history, fps=5):
+    assignments = reconstruct(result, history)
+    pygame.init()
+
+    screen = pygame.display.set_mode(SIZE)
+    renderer = Renderer(values, screen)
+    pygame.display.flip()
 
     clock = pygame.time.Clock()
 
-    while True:
+    for box, value in assignments:
         pygame.event.pump()
-        theSquares = []
-        initXLoc = 0
-        initYLoc = 0
-        startX, startY, editable, number = 0, 0, "N", 0
-        for y in range(9):
-            for x in range(9):
-                if x in (0, 1, 2):  startX = (x * 57) + 38
-                if x in (3, 4, 5):  startX = (x * 57) + 99
-                if x in (6, 7, 8):  startX = (x * 57) + 159
-
-                if y in (0, 1, 2):  startY = (y * 57) + 35
-                if y in (3, 4, 5):  startY = (y * 57) + 100
-                if y in (6, 7, 8):  startY = (y * 57) + 165
-                string_number = values[rows[y] + cols[x]]
-                if len(string_number) > 1 or string_number == '' or string_number == '.':
-                    number = None
-                else:
-                    number = int(string_number)
-                theSquares.append(SudokuSquare.SudokuSquare(number, startX, startY, editable, x, y))
-
-        screen.blit(background_image, (0, 0))
-        for num in theSquares:
-            num.draw()
-
-        pygame.display.flip()
-        pygame.display.update()
-        clock.tick(5)
-
-        if len(assignments) == 0:
-            break
-        box, value = assignments.pop()
-        values[box] = value
+        clock.tick(fps)
+        rect = renderer.assign(box, value)
+        if rect is not None:
+            pygame.display.update(rect)
 
     # leave game showing until closed by user
     while True:
@@ -57,3 +189,30 @@ def play(values, result, history):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 quit()
+
+
+if __name__ == "__main__":
+    import argparse
+    import solution
+
+    parser = argparse.ArgumentParser(description="Record the replay of a diagonal Sudoku solution " +
+        "without a display.")
+    parser.add_argument('grid', nargs='?', default='2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3',
+                        help="The 81 character grid to solve")
+    parser.add_argument('--frames', help="Directory to write numbered PNG frames to")
+    parser.add_argument('--gif', help="File to write an animated GIF to (requires Pillow)")
+    parser.add_argument('--duration', type=int, default=200,
+                        help="Milliseconds per GIF frame (default: 200)")
+    parser.add_argument('--every', type=int, default=1,
+                        help="Only write every n-th step of the replay (default: 1)")
+    args = parser.parse_args()
+    if not (args.frames or args.gif):
+        parser.error("nothing to do; use --frames and/or --gif")
+
+    history = AssignmentLog()
+    result = solution.solve(args.grid, log=history)
+    if not result:
+        parser.exit(1, "The puzzle has no solution\n")
+    count = render(grid2values(args.grid), result, history, args.frames, args.gif, args.duration,
+                   args.every)
+    print("Rendered {} frames".format(count))
@@ -0,0 +1,214 @@
+"""Benchmark the Sudoku solvers on corpora of puzzles of different difficulty
+
+Every combination of corpus, solver mode and strategy mix is run over all
+puzzles of the corpus. The wall time, search nodes, backtracks, propagation
+passes, the depth of the search tree and the mean number of alternatives at
+its branching points are printed as a table and can be written to a JSON
+report. A report from an earlier run can be passed as a baseline to flag the
+combinations that became slower.
+
+Example:
+
+    python benchmark.py -c hard 17clue -m bitboard dlx -o report.json
+    python benchmark.py --baseline report.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+
+from datetime import datetime
+from timeit import default_timer as timer
+
+import bitboard
+import dlx
+import solution
+from geometry import get_geometry
+from run_batch import read_grids
+from stats import SolverStats
+
+
+PUZZLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzles')
+
+# corpus name -> (file in PUZZLE_DIR, whether the puzzles use the diagonal units)
+CORPORA = {'easy': ('easy.txt', False),
+           'hard': ('hard.txt', False),
+           '17clue': ('17clue.txt', False),
+           'diagonal': ('diagonal.txt', True)}
+
+# strategies applied by the bitboard searches in addition to `bitboard.propagate`
+MIXES = {'basic': (),
+         'locked': ('pointing_pairs', 'box_line_reduction'),
+         'subsets': ('naked_triples', 'hidden_pairs'),
+         'all': tuple(name for name in bitboard.STRATEGIES if name not in bitboard.DEFAULT_STRATEGIES)}
+
+
+def _solve_dict(grid, geometry, extra, stats):
+    return solution.solve(grid, stats=stats)
+
+
+def _solve_bitboard(grid, geometry, extra, stats):
+    return bitboard.solve(grid, False, geometry, extra, stats)
+
+
+def _solve_trail(grid, geometry, extra, stats):
+    return bitboard.solve(grid, True, geometry, extra, stats)
+
+
+def _solve_dlx(grid, geometry, extra, stats):
+    return dlx.solve(grid, geometry, stats)
+
+
+# mode name -> (solver, whether it uses the strategy mix, whether it supports standard puzzles)
+MODES = {'dict': (_solve_dict, False, False),
+         'bitboard': (_solve_bitboard, True, True),
+         'trail': (_solve_trail, True, True),
+         'dlx': (_solve_dlx, False, True)}
+
+
+def load_corpus(name):
+    """Return the grids of a corpus and the geometry they are solved with"""
+    filename, diagonal = CORPORA[name]
+    with open(os.path.join(PUZZLE_DIR, filename)) as infile:
+        grids = list(read_grids(infile))
+    return grids, get_geometry(3, diagonal)
+
+
+def is_solution(values, grid, geometry):
+    """Check that every unit holds every digit once and that the clues are kept"""
+    if not values:
+        return False
+    if any(clue not in '.0' and clue != values[box] for clue, box in zip(grid, geometry.boxes)):
+        return False
+    return all(sorted(values[box] for box in unit) == sorted(geometry.digits)
+               for unit in geometry.unitlist)
+
+
+def run_case(grids, geometry, mode, extra, repeat=1):
+    """Solve every grid with one solver mode and strategy mix
+
+    Parameters
+    ----------
+    grids(list)
+        strings representing sudoku grids
+
+    geometry(Geometry)
+        the geometry of the puzzles
+
+    mode(string)
+        a key of `MODES`
+
+    extra(sequence)
+        the strategies to apply in addition to propagation
+
+    repeat(int)
+        the number of times to solve the corpus; the fastest run is reported
+
+    Returns
+    -------
+    dict
+        The timings and counters of the run
+    """
+    solver = MODES[mode][0]
+    best = None
+    for _ in range(repeat):
+        stats = SolverStats()
+        times, solved = [], 0
+        for grid in grids:
+            start = timer()
+            values = solver(grid, geometry, extra, stats)
+            times.append(timer() - start)
+            solved += is_solution(values, grid, geometry)
+        if best is None or sum(times) < sum(best[0]):
+            best = times, solved, stats
+    times, solved, stats = best
+    counters = stats.as_dict()
+    return {'puzzles': len(grids),
+            'solved': solved,
+            'seconds': sum(times),
+            'mean_seconds': sum(times) / len(times) if times else 0.,
+            'max_seconds': max(times, default=0.),
+            'nodes': stats.nodes,
+            'backtracks': stats.backtracks,
+            'passes': stats.passes(),
+            'max_depth': stats.max_depth,
+            'branch_factor': stats.branch_factor(),
+            'strategies': counters['strategies']}
+
+
+def run_benchmark(corpora, modes, mixes, repeat=1):
+    """Run every combination of corpus, mode and strategy mix and return a report dict"""
+    results = []
+    for corpus in corpora:
+        grids, geometry = load_corpus(corpus)
+        for mode in modes:
+            solver, uses_mix, standard = MODES[mode]
+            if not (standard or geometry.diagonal):
+                continue
+            for mix in (mixes if uses_mix else ['basic']):
+                result = {'corpus': corpus, 'mode': mode, 'mix': mix}
+                result.update(run_case(grids, geometry, mode, MIXES[mix], repeat))
+                results.append(result)
+    return {'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'results': results}
+
+
+def find_regressions(report, baseline, tolerance):
+    """Return the results that are slower than in the baseline by more than `tolerance`"""
+    def key(result):
+        return result['corpus'], result['mode'], result['mix']
+    previous = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = previous.get(key(result))
+        if old and result['seconds'] > old['seconds'] * tolerance:
+            regressions.append((result, old))
+    return regressions
+
+
+def print_report(report, outfile=sys.stdout):
+    header = "{:<10} {:<9} {:<8} {:>7} {:>10} {:>10} {:>8} {:>10} {:>9} {:>6} {:>7}"
+    print(header.format("Corpus", "Mode", "Mix", "Solved", "Seconds", "Max", "Nodes",
+                        "Backtracks", "Passes", "Depth", "Branch"), file=outfile)
+    row = "{:<10} {:<9} {:<8} {:>7} {:>10.4f} {:>10.4f} {:>8} {:>10} {:>9} {:>6} {:>7.2f}"
+    for result in report['results']:
+        print(row.format(result['corpus'], result['mode'], result['mix'],
+                         "{}/{}".format(result['solved'], result['puzzles']), result['seconds'],
+                         result['max_seconds'], result['nodes'], result['backtracks'],
+                         result['passes'], result['max_depth'], result['branch_factor']), file=outfile)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Sudoku solvers on puzzle corpora.")
+    parser.add_argument('-c', '--corpora', nargs='+', choices=sorted(CORPORA), default=sorted(CORPORA),
+                        help="Corpora to solve (default: all)")
+    parser.add_argument('-m', '--modes', nargs='+', choices=sorted(MODES), default=sorted(MODES),
+                        help="Solver modes to run (default: all)")
+    parser.add_argument('-x', '--mixes', nargs='+', choices=sorted(MIXES), default=sorted(MIXES),
+                        help="Strategy mixes for the bitboard modes (default: all)")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help="Number of runs of each case; the fastest is reported (default: 3)")
+    parser.add_argument('-o', '--output', help="File to write the JSON report to")
+    parser.add_argument('--baseline', help="JSON report to compare the timings against")
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help="Slowdown relative to the baseline that counts as a regression (default: 1.25)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.corpora, args.modes, args.mixes, args.repeat)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as outfile:
+            json.dump(report, outfile, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as infile:
+            regressions = find_regressions(report, json.load(infile), args.tolerance)
+        for result, old in regressions:
+            print("Regression: {corpus}/{mode}/{mix} took {seconds:.4f}s".format(**result) +
+                  " (baseline {:.4f}s)".format(old['seconds']), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
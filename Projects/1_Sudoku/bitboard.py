@@ -0,0 +1,1006 @@
+"""Bitmask solver engine for Sudoku puzzles
+
+This module implements the same strategies as solution.py (eliminate, only
+choice, naked twins and depth first search), but stores the board as a flat
+list of integers instead of a dictionary of strings. Bit ``i`` of a box mask
+is set when the digit ``geometry.digits[i]`` is still a candidate for that
+box, so removing candidates is a single ``&=`` and counting them is a table
+lookup.
+
+The unit and peer tables come from a `geometry.Geometry` as lists of box
+indices. Every function takes the geometry of the board as an optional
+argument; the default is the 9×9 diagonal geometry, whose units are exactly
+the ``unitlist`` of solution.py.
+
+Strategies are registered by name in `STRATEGIES`. `reduce_puzzle` applies
+any list of them, and the searches can apply extra strategies (e.g., hidden
+pairs or X-wing) whenever `propagate` runs out of work. Pass a
+`stats.SolverStats` to find out how many candidates each strategy removed
+and how long it took.
+"""
+from collections import deque
+from itertools import combinations
+from timeit import default_timer as timer
+
+from geometry import get_geometry
+
+
+DIAGONAL = get_geometry(3, diagonal=True)
+
+STRATEGIES = {}
+DEFAULT_STRATEGIES = ('eliminate', 'only_choice', 'naked_twins')
+
+
+def register_strategy(name):
+    """Return a decorator that adds a strategy to `STRATEGIES` under `name`
+
+    A strategy is a function ``strategy(board, geometry)`` that removes
+    candidates from the board in place and returns how many it removed. A
+    strategy that finds a contradiction leaves an empty box on the board.
+    """
+    def register(strategy):
+        STRATEGIES[name] = strategy
+        return strategy
+    return register
+
+
+def values2board(values, geometry=DIAGONAL):
+    """Convert the dictionary board representation to a list of bitmasks
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    list
+        a list of integer masks in the order of `geometry.boxes`
+    """
+    bit = geometry.bit
+    board = []
+    for box in geometry.boxes:
+        mask = 0
+        for digit in values[box]:
+            mask |= bit[digit]
+        board.append(mask)
+    return board
+
+
+def board2values(board, geometry=DIAGONAL):
+    """Convert a list of bitmasks back to the dictionary board representation
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks in the order of `geometry.boxes`
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    dict
+        a dictionary of the form {'box_name': '123456789', ...}
+    """
+    return {box: geometry.mask2digits(mask) for box, mask in zip(geometry.boxes, board)}
+
+
+@register_strategy('eliminate')
+def eliminate(board, geometry=DIAGONAL):
+    """Remove the digit of every solved box from the candidates of its peers
+
+    Each unit is scanned once to collect the digits of its solved boxes, which
+    are then cleared from the unsolved boxes of the same unit. A digit that is
+    solved twice in one unit empties the second box so that the contradiction
+    is reported by `reduce_puzzle`.
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    int
+        The number of candidates removed from the board
+    """
+    count, single = geometry.count, geometry.solved
+    removed = 0
+    for unit in geometry.unit_indices:
+        solved = 0
+        for idx in unit:
+            mask = board[idx]
+            if single[mask]:
+                if solved & mask:
+                    board[idx] = 0
+                solved |= mask
+        if not solved:
+            continue
+        for idx in unit:
+            mask = board[idx]
+            if mask & solved and not single[mask]:
+                board[idx] = mask & ~solved
+                removed += count[mask & solved]
+    return removed
+
+
+@register_strategy('only_choice')
+def only_choice(board, geometry=DIAGONAL):
+    """Assign every digit that fits in only one box of a unit to that box
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    int
+        The number of candidates removed from the board
+    """
+    count, single = geometry.count, geometry.solved
+    removed = 0
+    for unit in geometry.unit_indices:
+        once = twice = 0
+        for idx in unit:
+            mask = board[idx]
+            twice |= once & mask
+            once |= mask
+        singles = once & ~twice
+        if not singles:
+            continue
+        for idx in unit:
+            mask = board[idx]
+            if mask & singles and not single[mask]:
+                board[idx] = mask & singles
+                removed += count[mask] - count[mask & singles]
+    return removed
+
+
+@register_strategy('naked_twins')
+def naked_twins(board, geometry=DIAGONAL):
+    """Remove the digits of every pair of naked twins from the rest of their unit
+
+    All twins are collected from a unit before any candidates are removed, which
+    matches the convention used by `solution.naked_twins`.
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    int
+        The number of candidates removed from the board
+    """
+    count = geometry.count
+    removed = 0
+    for unit in geometry.unit_indices:
+        candidates = [idx for idx in unit if count[board[idx]] == 2]
+        if len(candidates) < 2:
+            continue
+        pairs = {}
+        for idx in candidates:
+            pairs.setdefault(board[idx], []).append(idx)
+        for pair, owners in pairs.items():
+            if len(owners) < 2:
+                continue
+            reserved = owners[:2]
+            for idx in unit:
+                if idx not in reserved and board[idx] & pair:
+                    removed += count[board[idx] & pair]
+                    board[idx] &= ~pair
+    return removed
+
+
+def _naked_subsets(board, geometry, size):
+    """Remove the digits of every `size` boxes that share `size` digits from the rest of their unit"""
+    count = geometry.count
+    removed = 0
+    for unit in geometry.unit_indices:
+        candidates = [idx for idx in unit if 1 < count[board[idx]] <= size]
+        for subset in combinations(candidates, size):
+            digits = 0
+            for idx in subset:
+                digits |= board[idx]
+            if count[digits] > size:
+                continue
+            if count[digits] < size:
+                board[subset[0]] = 0
+                return removed
+            for idx in unit:
+                mask = board[idx]
+                if mask & digits and idx not in subset:
+                    board[idx] = mask & ~digits
+                    removed += count[mask & digits]
+    return removed
+
+
+def _hidden_subsets(board, geometry, size):
+    """Restrict every `size` boxes that hold the only places of `size` digits in a unit to those digits"""
+    count, single = geometry.count, geometry.solved
+    removed = 0
+    for unit in geometry.unit_indices:
+        solved = 0
+        for idx in unit:
+            if single[board[idx]]:
+                solved |= board[idx]
+        # the places of each unsolved digit, as a mask over the positions in the unit
+        places = {}
+        for pos, idx in enumerate(unit):
+            mask = board[idx] & ~solved
+            while mask:
+                bit = mask & -mask
+                mask ^= bit
+                places[bit] = places.get(bit, 0) | 1 << pos
+        candidates = [bit for bit, where in places.items() if 1 < count[where] <= size]
+        for subset in combinations(candidates, size):
+            digits = where = 0
+            for bit in subset:
+                digits |= bit
+                where |= places[bit]
+            if count[where] > size:
+                continue
+            if count[where] < size:
+                board[unit[0]] = 0
+                return removed
+            for pos, idx in enumerate(unit):
+                mask = board[idx]
+                if where >> pos & 1 and mask & ~digits:
+                    board[idx] = mask & digits
+                    removed += count[mask & ~digits]
+    return removed
+
+
+def _locked_candidates(board, geometry, pointing):
+    """Remove the digits confined to the intersection of a square and a line
+
+    If `pointing` is True, digits that only fit in the intersection within the
+    square are removed from the rest of the line; otherwise, digits that only
+    fit in the intersection within the line are removed from the rest of the
+    square.
+    """
+    count = geometry.count
+    removed = 0
+    for square, line, common in geometry.intersections:
+        source, target = (square, line) if pointing else (line, square)
+        inside = outside = 0
+        for idx in source:
+            if idx in common:
+                inside |= board[idx]
+            else:
+                outside |= board[idx]
+        digits = inside & ~outside
+        if not digits:
+            continue
+        for idx in target:
+            mask = board[idx]
+            if mask & digits and idx not in common:
+                board[idx] = mask & ~digits
+                removed += count[mask & digits]
+    return removed
+
+
+@register_strategy('naked_triples')
+def naked_triples(board, geometry=DIAGONAL):
+    """Remove the digits of every three boxes that share three digits from the rest of their unit
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    int
+        The number of candidates removed from the board
+    """
+    return _naked_subsets(board, geometry, 3)
+
+
+@register_strategy('naked_quads')
+def naked_quads(board, geometry=DIAGONAL):
+    """Remove the digits of every four boxes that share four digits from the rest of their unit
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    int
+        The number of candidates removed from the board
+    """
+    return _naked_subsets(board, geometry, 4)
+
+
+@register_strategy('hidden_pairs')
+def hidden_pairs(board, geometry=DIAGONAL):
+    """Remove the other candidates from two boxes that hold the only places of two digits in a unit
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    int
+        The number of candidates removed from the board
+    """
+    return _hidden_subsets(board, geometry, 2)
+
+
+@register_strategy('hidden_triples')
+def hidden_triples(board, geometry=DIAGONAL):
+    """Remove the other candidates from three boxes that hold the only places of three digits in a unit
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    int
+        The number of candidates removed from the board
+    """
+    return _hidden_subsets(board, geometry, 3)
+
+
+@register_strategy('pointing_pairs')
+def pointing_pairs(board, geometry=DIAGONAL):
+    """Remove the digits that fit only on one line of a square from the rest of that line
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    int
+        The number of candidates removed from the board
+    """
+    return _locked_candidates(board, geometry, pointing=True)
+
+
+@register_strategy('box_line_reduction')
+def box_line_reduction(board, geometry=DIAGONAL):
+    """Remove the digits that fit only in one square of a line from the rest of that square
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    int
+        The number of candidates removed from the board
+    """
+    return _locked_candidates(board, geometry, pointing=False)
+
+
+@register_strategy('x_wing')
+def x_wing(board, geometry=DIAGONAL):
+    """Remove a digit from two columns when it fits only in those columns in two rows
+
+    The same is done with the roles of the rows and the columns swapped.
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    int
+        The number of candidates removed from the board
+    """
+    count = geometry.count
+    removed = 0
+    for lines, crossing in ((geometry.row_units, geometry.column_units),
+                            (geometry.column_units, geometry.row_units)):
+        for bit in geometry.bit.values():
+            # line i crosses line pos of `crossing` at its box in position pos
+            seen = {}
+            for i, line in enumerate(lines):
+                places = 0
+                for pos, idx in enumerate(line):
+                    if board[idx] & bit:
+                        places |= 1 << pos
+                if count[places] != 2:
+                    continue
+                first = seen.setdefault(places, i)
+                if first == i:
+                    continue
+                for pos in range(len(line)):
+                    if not places >> pos & 1:
+                        continue
+                    for j, idx in enumerate(crossing[pos]):
+                        if j != first and j != i and board[idx] & bit:
+                            board[idx] &= ~bit
+                            removed += 1
+    return removed
+
+
+def reduce_puzzle(board, geometry=DIAGONAL, strategies=DEFAULT_STRATEGIES, stats=None):
+    """Repeatedly apply the constraint strategies until the board stops changing
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    geometry(Geometry)
+        the geometry of the board
+
+    strategies(sequence)
+        the names of the strategies from `STRATEGIES` to apply, in order
+
+    stats(SolverStats)
+        if given, the calls, removed candidates and time of every strategy are
+        added to it
+
+    Returns
+    -------
+    list or False
+        The reduced board, or False if some box has no candidates left
+    """
+    strategies = [(name, STRATEGIES[name]) for name in strategies]
+    while True:
+        removed = 0
+        for name, strategy in strategies:
+            if stats is None:
+                removed += strategy(board, geometry)
+            else:
+                removed += stats.run(name, strategy, board, geometry)
+        if 0 in board:
+            return False
+        if not removed:
+            return board
+
+
+def propagate(board, units=None, trail=None, geometry=DIAGONAL):
+    """Apply all constraint strategies incrementally using a queue of dirty units
+
+    Unlike `reduce_puzzle`, which sweeps the whole board until nothing changes,
+    this only revisits the units of boxes whose candidates actually changed.
+    Each unit taken from the queue gets the eliminate, only choice and naked
+    twins strategies applied within that unit; every box it changes puts the
+    units of that box back on the queue. Contradictions (an empty box, a digit
+    solved twice, or a digit with no place left in a unit) stop the
+    propagation immediately.
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    units(iterable)
+        indices into `geometry.unit_indices` of the units that must be
+        examined; all units are examined if this is None
+
+    trail(list)
+        if given, an ``(index, old_mask)`` entry is appended for every box that
+        is changed, so that the changes can be rolled back (see `undo`)
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    list or False
+        The reduced board, or False if the puzzle is unsolvable
+    """
+    count, single, full = geometry.count, geometry.solved, geometry.full
+    unit_indices, box_units = geometry.unit_indices, geometry.box_units
+    queue = deque(range(len(unit_indices)) if units is None else units)
+    queued = [False] * len(unit_indices)
+    for u in queue:
+        queued[u] = True
+
+    while queue:
+        u = queue.popleft()
+        queued[u] = False
+        unit = unit_indices[u]
+
+        # eliminate and only choice
+        solved = once = twice = 0
+        for idx in unit:
+            mask = board[idx]
+            if single[mask]:
+                if solved & mask:
+                    return False
+                solved |= mask
+            twice |= once & mask
+            once |= mask
+        if once != full:
+            return False
+        if solved == full:
+            continue
+        singles = once & ~twice & ~solved
+
+        changed = []
+        for idx in unit:
+            mask = board[idx]
+            if single[mask]:
+                continue
+            new = mask & ~solved
+            if new & singles:
+                new &= singles
+                if not single[new]:
+                    return False
+            if new != mask:
+                if not new:
+                    return False
+                if trail is not None:
+                    trail.append((idx, mask))
+                board[idx] = new
+                changed.append(idx)
+
+        # naked twins
+        twins = [idx for idx in unit if count[board[idx]] == 2]
+        if len(twins) > 1:
+            owners = {}
+            for idx in twins:
+                owners.setdefault(board[idx], []).append(idx)
+            for pair, reserved in owners.items():
+                if len(reserved) < 2:
+                    continue
+                if len(reserved) > 2:
+                    return False
+                for idx in unit:
+                    mask = board[idx]
+                    if mask & pair and idx not in reserved:
+                        if not mask & ~pair:
+                            return False
+                        if trail is not None:
+                            trail.append((idx, mask))
+                        board[idx] = mask & ~pair
+                        changed.append(idx)
+
+        for idx in changed:
+            for v in box_units[idx]:
+                if not queued[v]:
+                    queued[v] = True
+                    queue.append(v)
+    return board
+
+
+def propagate_all(board, units=None, trail=None, geometry=DIAGONAL, extra=(), stats=None):
+    """Run `propagate` and the extra strategies until none of them changes the board
+
+    The extra strategies are only applied once `propagate` runs out of work,
+    and the units of every box they change are propagated again.
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    units(iterable)
+        indices of the units to propagate first (see `propagate`)
+
+    trail(list)
+        if given, the changes made by every strategy are recorded on it
+
+    geometry(Geometry)
+        the geometry of the board
+
+    extra(sequence)
+        the names of strategies from `STRATEGIES` to apply after `propagate`
+
+    stats(SolverStats)
+        if given, `propagate` and every extra strategy are recorded in it
+
+    Returns
+    -------
+    list or False
+        The reduced board, or False if the puzzle is unsolvable
+    """
+    if not extra and stats is None:
+        return propagate(board, units, trail, geometry)
+    count = geometry.count
+    strategies = [(name, STRATEGIES[name]) for name in extra]
+    while True:
+        if stats is None:
+            if not propagate(board, units, trail, geometry):
+                return False
+        else:
+            before = sum(count[mask] for mask in board)
+            start = timer()
+            result = propagate(board, units, trail, geometry)
+            stats.record('propagate', before - sum(count[mask] for mask in board), timer() - start)
+            if not result:
+                return False
+        if not strategies:
+            return board
+
+        snapshot = board[:]
+        for name, strategy in strategies:
+            if stats is None:
+                strategy(board, geometry)
+            else:
+                stats.run(name, strategy, board, geometry)
+        changed = [idx for idx, mask in enumerate(snapshot) if board[idx] != mask]
+        if not changed:
+            return board
+        if trail is not None:
+            trail.extend((idx, snapshot[idx]) for idx in changed)
+        if 0 in board:
+            return False
+        units = {u for idx in changed for u in geometry.box_units[idx]}
+
+
+def select_box(board, geometry=DIAGONAL):
+    """Choose one of the unfilled boxes with the fewest possibilities
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks
+
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    int or None
+        The index of the chosen box, or None if every box is solved
+    """
+    count = geometry.count
+    best, search_idx = len(geometry.digits) + 1, None
+    for idx, mask in enumerate(board):
+        if 1 < count[mask] < best:
+            best, search_idx = count[mask], idx
+            if best == 2:
+                break
+    return search_idx
+
+
+def search(board, units=None, geometry=DIAGONAL, extra=(), stats=None):
+    """Solve the board with constraint propagation and depth first search
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    units(iterable)
+        indices of the units to propagate before searching (see `propagate`)
+
+    geometry(Geometry)
+        the geometry of the board
+
+    extra(sequence)
+        the names of strategies to apply when `propagate` runs out of work
+
+    stats(SolverStats)
+        if given, the work done by every strategy is recorded in it
+
+    Returns
+    -------
+    list or False
+        The solved board or False if no solution exists
+    """
+    board = propagate_all(board, units, None, geometry, extra, stats)
+    if not board:
+        return False
+
+    search_idx = select_box(board, geometry)
+    if search_idx is None:
+        return board
+
+    candidates = board[search_idx]
+    if stats is not None:
+        stats.branch(geometry.count[candidates])
+    while candidates:
+        bit = candidates & -candidates
+        candidates ^= bit
+        child = board[:]
+        child[search_idx] = bit
+        if stats is None:
+            child = search(child, geometry.box_units[search_idx], geometry, extra, stats)
+        else:
+            stats.nodes += 1
+            stats.depth += 1
+            child = search(child, geometry.box_units[search_idx], geometry, extra, stats)
+            stats.depth -= 1
+        if child:
+            return child
+        if stats is not None:
+            stats.backtracks += 1
+    return False
+
+
+def undo(board, trail, mark):
+    """Roll the board back to the state it had when the trail had `mark` entries
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    trail(list)
+        a list of ``(index, old_mask)`` entries recorded by `propagate`
+
+    mark(int)
+        the length of the trail to roll back to
+    """
+    while len(trail) > mark:
+        idx, mask = trail.pop()
+        board[idx] = mask
+
+
+def search_trail(board, geometry=DIAGONAL, extra=(), stats=None):
+    """Solve the board with depth first search on a single board and an undo trail
+
+    This explores the same search tree as `search`, but instead of copying the
+    board for every branch it changes one board in place, records every change
+    on a trail and rolls the trail back when a branch fails. The search tree is
+    kept on an explicit stack, so memory use stays flat and deep searches on
+    larger boards cannot hit Python's recursion limit.
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    geometry(Geometry)
+        the geometry of the board
+
+    extra(sequence)
+        the names of strategies to apply when `propagate` runs out of work
+
+    stats(SolverStats)
+        if given, the work done by every strategy is recorded in it
+
+    Returns
+    -------
+    list or False
+        The solved board or False if no solution exists
+    """
+    trail = []
+    if not propagate_all(board, None, trail, geometry, extra, stats):
+        return False
+    if stats is not None:
+        first_node, first_depth = stats.nodes, stats.depth
+
+    # each stack entry holds a branching box, the digits not yet tried there
+    # and the length of the trail before the branch was entered
+    stack = []
+    while True:
+        search_idx = select_box(board, geometry)
+        if search_idx is None:
+            if stats is not None:
+                # every branch entered is a backtrack unless it is on the stack
+                stats.backtracks += stats.nodes - first_node - len(stack)
+                stats.depth = first_depth
+            return board
+        if stats is not None:
+            stats.depth = first_depth + len(stack)
+            stats.branch(geometry.count[board[search_idx]])
+        stack.append([search_idx, board[search_idx], len(trail)])
+
+        while stack:
+            search_idx, candidates, mark = frame = stack[-1]
+            undo(board, trail, mark)
+            if not candidates:
+                stack.pop()
+                continue
+            bit = candidates & -candidates
+            frame[1] = candidates ^ bit
+            trail.append((search_idx, board[search_idx]))
+            board[search_idx] = bit
+            if stats is not None:
+                stats.nodes += 1
+            if propagate_all(board, geometry.box_units[search_idx], trail, geometry, extra, stats):
+                break
+        else:
+            if stats is not None:
+                stats.backtracks += stats.nodes - first_node
+                stats.depth = first_depth
+            return False
+
+
+def count_board(board, limit=2, geometry=DIAGONAL, extra=()):
+    """Count the solutions of a board, stopping once `limit` of them are found
+
+    This is `search_trail` without stopping at the first solution: every
+    solution found is counted, and the search backtracks to look for the next
+    one until the search tree is exhausted or the limit is reached.
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    limit(int)
+        the number of solutions after which counting stops; None counts all of them
+
+    geometry(Geometry)
+        the geometry of the board
+
+    extra(sequence)
+        the names of strategies to apply when `propagate` runs out of work
+
+    Returns
+    -------
+    int
+        The number of solutions, or `limit` if there are at least that many
+    """
+    if limit is None:
+        limit = float('inf')
+    trail = []
+    if not propagate_all(board, None, trail, geometry, extra):
+        return 0
+
+    found = 0
+    stack = []
+    while True:
+        search_idx = select_box(board, geometry)
+        if search_idx is None:
+            found += 1
+            if found >= limit:
+                return found
+        else:
+            stack.append([search_idx, board[search_idx], len(trail)])
+
+        while stack:
+            search_idx, candidates, mark = frame = stack[-1]
+            undo(board, trail, mark)
+            if not candidates:
+                stack.pop()
+                continue
+            bit = candidates & -candidates
+            frame[1] = candidates ^ bit
+            trail.append((search_idx, board[search_idx]))
+            board[search_idx] = bit
+            if propagate_all(board, geometry.box_units[search_idx], trail, geometry, extra):
+                break
+        else:
+            return found
+
+
+def _count_branch(args):
+    """Count the solutions of one branch in a worker process"""
+    board, limit, size, diagonal, extra = args
+    geometry = get_geometry(size, diagonal)
+    return count_board(board, limit, geometry, extra)
+
+
+def count_solutions(grid, limit=2, geometry=DIAGONAL, extra=(), processes=None):
+    """Count the solutions of a Sudoku puzzle, e.g., to check that it has exactly one
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid.
+
+        Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    limit(int)
+        the number of solutions after which counting stops; the default is
+        enough to tell unsolvable, unique and ambiguous puzzles apart, and None
+        counts every solution
+
+    geometry(Geometry)
+        the geometry of the board
+
+    extra(sequence)
+        the names of strategies to apply in addition to `propagate`
+
+    processes(int)
+        if more than 1, the branches of the first box the search branches on
+        are counted in parallel by a `multiprocessing` pool of this size
+
+    Returns
+    -------
+    int
+        The number of solutions, or `limit` if there are at least that many
+    """
+    board = values2board(geometry.grid2values(grid), geometry)
+    if not processes or processes == 1:
+        return count_board(board, limit, geometry, extra)
+
+    if not propagate_all(board, None, None, geometry, extra):
+        return 0
+    search_idx = select_box(board, geometry)
+    if search_idx is None:
+        return 1
+    branches = []
+    candidates = board[search_idx]
+    while candidates:
+        bit = candidates & -candidates
+        candidates ^= bit
+        child = board[:]
+        child[search_idx] = bit
+        branches.append((child, limit, geometry.size, geometry.diagonal, extra))
+
+    from multiprocessing import Pool
+    found = 0
+    with Pool(min(processes, len(branches))) as pool:
+        # leaving the block terminates the branches that are still running
+        for count in pool.imap_unordered(_count_branch, branches):
+            found += count
+            if limit is not None and found >= limit:
+                return limit
+    return found
+
+
+def solve(grid, trail=False, geometry=DIAGONAL, extra=(), stats=None):
+    """Find the solution to a Sudoku puzzle using the bitmask engine
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid.
+
+        Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    trail(bool)
+        if True, search with `search_trail` instead of `search`
+
+    geometry(Geometry)
+        the geometry of the board; e.g., ``get_geometry(4, diagonal=False)``
+        solves standard 16×16 puzzles
+
+    extra(sequence)
+        the names of strategies from `STRATEGIES` to apply in addition to
+        `propagate`, e.g., ``('hidden_pairs', 'pointing_pairs')``
+
+    stats(SolverStats)
+        if given, the calls, removed candidates and time of every strategy are
+        added to it
+
+    Returns
+    -------
+    dict or False
+        The dictionary representation of the final sudoku grid or False if no solution exists.
+    """
+    board = values2board(geometry.grid2values(grid), geometry)
+    if trail:
+        board = search_trail(board, geometry, extra, stats)
+    else:
+        board = search(board, None, geometry, extra, stats)
+    if not board:
+        return False
+    return board2values(board, geometry)
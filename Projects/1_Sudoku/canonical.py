@@ -0,0 +1,245 @@
+"""Canonical forms of Sudoku puzzles under the symmetries of the board
+
+Relabeling the digits, permuting the bands, the stacks, the rows within a
+band and the columns within a stack, and transposing the board all turn a
+puzzle into an equivalent one: its solution is the solution of the original
+puzzle under the same transform. `canonical_form` picks one representative
+of every class of equivalent puzzles, so it can be used as a cache key that
+also matches the relabeled and permuted copies of a puzzle. The `Transform`
+it returns maps the solution of the canonical puzzle back to a solution of
+the original one.
+
+The canonical form is found in two steps. The first step only looks at which
+boxes hold a clue, and finds the transforms that move this pattern to its
+smallest form, with as many empty boxes as possible in front. The second
+step relabels the digits under each of those transforms in order of their
+first appearance and keeps the smallest grid. Diagonal Sudoku only allows
+the transforms that keep both diagonals units: the rows and the columns are
+permuted together by a permutation that commutes with reversing the board
+(96 transforms in all for 9×9 boards), so every one of them is tried. Standard
+boards have 2·6⁸ transforms, so the first step sorts the rows of the pattern
+into bands for each order of the columns instead.
+
+The search enumerates the permutations of the columns explicitly, so only
+boards up to 9×9 are supported.
+"""
+from array import array
+from functools import lru_cache
+from itertools import chain, groupby, permutations, product
+
+from geometry import get_geometry
+
+
+DIAGONAL = get_geometry(3, diagonal=True)
+
+MAX_SIZE = 3
+
+
+class Transform:
+    """A symmetry of the board followed by a relabeling of the digits
+
+    Attributes
+    ----------
+    cells : tuple
+        The index of the box of the original grid that is moved to each box
+        of the canonical grid
+
+    labels : dict
+        Mapping from each digit of the original grid to its canonical digit
+    """
+    def __init__(self, cells, labels):
+        self.cells = cells
+        self.labels = labels
+
+    def __repr__(self):
+        return "Transform(cells={}, labels={})".format(self.cells, self.labels)
+
+    def apply(self, grid):
+        """Return the canonical version of a grid, with '.' for the empty boxes"""
+        table = str.maketrans(self.labels)
+        return ''.join(grid[idx] for idx in self.cells).replace('0', '.').translate(table)
+
+    def restore(self, grid):
+        """Map a grid in canonical form, e.g., the solution of the canonical puzzle, back to the original"""
+        table = str.maketrans({label: digit for digit, label in self.labels.items()})
+        result = [None] * len(self.cells)
+        for idx, value in zip(self.cells, grid.translate(table)):
+            result[idx] = value
+        return ''.join(result)
+
+
+def _relabel(grid, digits):
+    """Rename the digits of a grid in order of their first appearance and return the grid and the labels"""
+    order = [digit for digit in dict.fromkeys(grid) if digit != '.']
+    labels = dict(zip(order, digits))
+    return grid.translate(str.maketrans(labels)), labels
+
+
+def _tied_orders(items, key):
+    """Yield every ordering of the sorted `items` that keeps `key` in ascending order"""
+    groups = [list(group) for _, group in groupby(items, key)]
+    for parts in product(*(list(permutations(group)) for group in groups)):
+        yield tuple(chain.from_iterable(parts))
+
+
+@lru_cache()
+def _line_orders(size):
+    """Return every permutation of the rows (or columns) that keeps the bands (or stacks) together"""
+    perms = list(permutations(range(size)))
+    orders = []
+    for bands in perms:
+        for within in product(perms, repeat=size):
+            orders.append(tuple(band * size + within[band][i] for band in bands for i in range(size)))
+    return orders
+
+
+@lru_cache()
+def _pattern_tables(size):
+    """Return, for every order of `_line_orders`, the table that moves the clue pattern of a row
+
+    A clue pattern has bit ``c`` set when column ``c`` holds a clue. After
+    moving, the first column of the order is the most significant bit, so a
+    smaller pattern starts with more empty boxes.
+    """
+    n = size * size
+    tables = []
+    for order in _line_orders(size):
+        table = array('H', [0])
+        for c in range(n):
+            bit = 1 << (n - 1 - order.index(c))
+            table.extend([value | bit for value in table])
+        tables.append(table)
+    return tables
+
+
+@lru_cache()
+def _diagonal_transforms(size):
+    """Return the transforms that keep both diagonals of the board units
+
+    Each transform is a pair of tuples: the cell map of `Transform.cells` and
+    its inverse, the box of the canonical grid each box is moved to.
+    """
+    n = size * size
+    flip = tuple(range(n - 1, -1, -1))
+    transforms = []
+    for rows in _line_orders(size):
+        if any(rows[n - 1 - i] != n - 1 - rows[i] for i in range(n)):
+            continue
+        for cols in (rows, tuple(flip[r] for r in rows)):
+            for cells in (tuple(r * n + c for r in rows for c in cols),
+                          tuple(c * n + r for r in rows for c in cols)):
+                positions = [0] * len(cells)
+                for position, idx in enumerate(cells):
+                    positions[idx] = position
+                transforms.append((cells, tuple(positions)))
+    return transforms
+
+
+def _diagonal_candidates(grid, size):
+    """Yield the cell maps of the diagonal transforms that move the clues of a grid to their smallest pattern"""
+    clues = [idx for idx, value in enumerate(grid) if value != '.']
+    # a pattern is smaller when its first clue comes later, i.e., when its sorted positions are larger
+    patterns = [(sorted([positions[idx] for idx in clues]), cells)
+                for cells, positions in _diagonal_transforms(size)]
+    best = max(pattern for pattern, _ in patterns)
+    return [cells for pattern, cells in patterns if pattern == best]
+
+
+def _row_value(stack_counts, size):
+    """Return the smallest clue pattern a row with the given number of clues per stack can be moved to"""
+    value = 0
+    for count in sorted(stack_counts):
+        value = (value << size) | ((1 << count) - 1)
+    return value
+
+
+def _pattern_candidates(grid, size):
+    """Yield the (rows, columns) cell maps that move the clue pattern of a standard grid to its smallest form"""
+    n = size * size
+    layouts = []
+    for transpose in (False, True):
+        cells = [[c * n + r if transpose else r * n + c for c in range(n)] for r in range(n)]
+        clues = [sum(1 << c for c in range(n) if grid[row[c]] != '.') for row in cells]
+        layouts.append((cells, clues))
+
+    # the first row of the smallest pattern is the smallest row any transform can produce, so
+    # only the column orders that move one of the rows that can become that row are searched
+    low = (1 << size) - 1
+    smallest = [[_row_value([bin(mask >> s & low).count('1') for s in range(0, n, size)], size)
+                 for mask in clues] for _, clues in layouts]
+    first = min(min(values) for values in smallest)
+
+    best, found = None, []
+    for (cells, clues), values in zip(layouts, smallest):
+        leaders = [clues[r] for r in range(n) if values[r] == first]
+        for order, table in zip(_line_orders(size), _pattern_tables(size)):
+            if not any(table[mask] == first for mask in leaders):
+                continue
+            values = [table[mask] for mask in clues]
+            key = sorted([tuple(sorted(values[b:b + size])) for b in range(0, n, size)])
+            if best is None or key < best:
+                best, found = key, []
+            if key == best:
+                found.append((cells, order, values))
+
+    seen = set()
+    for cells, order, values in found:
+        rows = [[cell[c] for c in order] for cell in cells]
+        grids = tuple(''.join(grid[idx] for idx in row) for row in rows)
+        if grids in seen:
+            continue
+        seen.add(grids)
+        bands = [tuple(sorted(range(b, b + size), key=values.__getitem__)) for b in range(0, n, size)]
+        band_key = [[values[r] for r in band] for band in bands]
+        for band_order in _tied_orders(sorted(range(size), key=band_key.__getitem__), band_key.__getitem__):
+            for parts in product(*(_tied_orders(bands[b], values.__getitem__) for b in band_order)):
+                yield tuple(chain.from_iterable(rows[r] for r in chain.from_iterable(parts)))
+
+
+def canonical_form(grid, geometry=DIAGONAL):
+    """Return the canonical form of a puzzle and the transform that produces it
+
+    Two puzzles have the same canonical form exactly when one can be turned
+    into the other by relabeling its digits and applying a symmetry of the
+    board; for diagonal Sudoku, the symmetry must keep both diagonals units.
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid; '.' or '0' marks an empty box, and every
+        other character must be one of `geometry.digits`
+
+    geometry(Geometry)
+        the geometry of the puzzle; boards larger than 9×9 are not supported
+
+    Returns
+    -------
+    tuple
+        The canonical grid, with '.' for the empty boxes, and the `Transform`
+        that maps `grid` to it
+    """
+    if geometry.size > MAX_SIZE:
+        raise ValueError("Canonical forms are only supported for boards with squares of up to "
+                         "{0}×{0} boxes".format(MAX_SIZE))
+    if len(grid) != len(geometry.boxes):
+        raise ValueError("Expected a grid of {} characters, got {}".format(len(geometry.boxes), len(grid)))
+    invalid = set(grid) - set(geometry.digits + '.0')
+    if invalid:
+        raise ValueError("Unexpected characters {!r} in the grid".format(''.join(sorted(invalid))))
+    grid = grid.replace('0', '.')
+    if geometry.diagonal:
+        candidates = _diagonal_candidates(grid, geometry.size)
+    else:
+        candidates = _pattern_candidates(grid, geometry.size)
+
+    best = None
+    for cells in candidates:
+        key, labels = _relabel(''.join(grid[idx] for idx in cells), geometry.digits)
+        if best is None or key < best[0]:
+            best = key, cells, labels
+
+    key, cells, labels = best
+    # digits missing from the puzzle take the remaining labels, so that `restore` can map any solution
+    missing = [digit for digit in geometry.digits if digit not in labels]
+    labels.update(zip(missing, geometry.digits[len(labels):]))
+    return key, Transform(cells, labels)
@@ -0,0 +1,261 @@
+"""Exact cover solver for Sudoku puzzles using dancing links (Algorithm X)
+
+A Sudoku puzzle is an exact cover problem. Each row of the cover matrix
+places one digit in one box. The columns are the constraints "box X holds a
+digit" and "unit U holds digit d" for every unit of the geometry (rows,
+columns, squares and, for diagonal Sudoku, the two diagonals). A solution
+picks rows so that every column is covered exactly once.
+
+The matrix is stored as Knuth's dancing links, using parallel lists of node
+indices instead of node objects. Node 0 is the root, nodes 1 to the number of
+columns are the column headers, and the remaining nodes are the ones in the
+matrix. The links for each geometry are built once and copied for every
+puzzle. The search always branches on the column with the fewest rows and is
+iterative, so boards of any size are solved without recursion.
+"""
+from functools import lru_cache
+
+from geometry import get_geometry
+
+
+DIAGONAL = get_geometry(3, diagonal=True)
+
+
+class Links:
+    """The dancing links of a Sudoku cover matrix
+
+    Attributes
+    ----------
+    left, right, up, down : list
+        The neighbours of each node; the column headers are linked in a row
+        that starts and ends at the root
+
+    column : list
+        The column header of each node
+
+    size : list
+        The number of rows that are still linked into each column
+
+    row : list
+        The matrix row of each node; row ``box * len(digits) + digit`` places
+        the digit with that index in that box
+
+    first : list
+        The first node of each matrix row
+    """
+    def __init__(self, left, right, up, down, column, size, row, first):
+        self.left = left
+        self.right = right
+        self.up = up
+        self.down = down
+        self.column = column
+        self.size = size
+        self.row = row
+        self.first = first
+
+    def copy(self):
+        """Return links that can be changed without changing these ones"""
+        return Links(self.left[:], self.right[:], self.up[:], self.down[:],
+                     self.column, self.size[:], self.row, self.first)
+
+
+@lru_cache()
+def build_links(geometry=DIAGONAL):
+    """Build the dancing links for an empty board of the given geometry
+
+    Parameters
+    ----------
+    geometry(Geometry)
+        the geometry of the board
+
+    Returns
+    -------
+    Links
+        The links of the cover matrix; they are shared, so use `Links.copy`
+        before changing them
+    """
+    n = len(geometry.digits)
+    nboxes = len(geometry.boxes)
+    ncols = nboxes + len(geometry.unit_indices) * n
+
+    left = [ncols] + list(range(ncols))
+    right = list(range(1, ncols + 1)) + [0]
+    up = list(range(ncols + 1))
+    down = list(range(ncols + 1))
+    column = list(range(ncols + 1))
+    size = [0] * (ncols + 1)
+    row = [-1] * (ncols + 1)
+    first = []
+
+    for box in range(nboxes):
+        for digit in range(n):
+            columns = [1 + box] + [1 + nboxes + u * n + digit for u in geometry.box_units[box]]
+            start = len(left)
+            first.append(start)
+            for offset, col in enumerate(columns):
+                node = start + offset
+                left.append(start + (offset - 1) % len(columns))
+                right.append(start + (offset + 1) % len(columns))
+                up.append(up[col])
+                down.append(col)
+                down[up[col]] = node
+                up[col] = node
+                column.append(col)
+                row.append(box * n + digit)
+                size[col] += 1
+    return Links(left, right, up, down, column, size, row, first)
+
+
+def cover(links, col):
+    """Remove a column from the header list and its rows from the other columns"""
+    left, right, up, down = links.left, links.right, links.up, links.down
+    column, size = links.column, links.size
+    left[right[col]] = left[col]
+    right[left[col]] = right[col]
+    i = down[col]
+    while i != col:
+        j = right[i]
+        while j != i:
+            up[down[j]] = up[j]
+            down[up[j]] = down[j]
+            size[column[j]] -= 1
+            j = right[j]
+        i = down[i]
+
+
+def uncover(links, col):
+    """Undo `cover`; columns must be uncovered in the reverse order they were covered"""
+    left, right, up, down = links.left, links.right, links.up, links.down
+    column, size = links.column, links.size
+    i = up[col]
+    while i != col:
+        j = left[i]
+        while j != i:
+            size[column[j]] += 1
+            up[down[j]] = j
+            down[up[j]] = j
+            j = left[j]
+        i = up[i]
+    left[right[col]] = col
+    right[left[col]] = col
+
+
+def exact_covers(links, stats=None):
+    """Generate every set of rows that covers the remaining columns exactly once
+
+    Parameters
+    ----------
+    links(Links)
+        the links of the matrix; they are changed while the generator runs and
+        restored when it is exhausted
+
+    stats(SolverStats)
+        if given, every row chosen is counted as a search node and every row
+        taken back as a backtrack, and every column branched on is recorded
+        with its number of rows
+
+    Yields
+    ------
+    list
+        The matrix rows of each solution
+    """
+    right, left, down = links.right, links.left, links.down
+    column, size, row = links.column, links.size, links.row
+    chosen = []
+    if stats is not None:
+        first_depth = stats.depth
+    while True:
+        if right[0] == 0:
+            if stats is not None:
+                # the caller may stop at this solution
+                stats.depth = first_depth
+            yield [row[node] for node in chosen]
+            col = node = 0
+        else:
+            # branch on the column with the fewest rows
+            col, best = 0, None
+            c = right[0]
+            while c:
+                if best is None or size[c] < best:
+                    col, best = c, size[c]
+                    if best < 2:
+                        break
+                c = right[c]
+            if stats is not None:
+                stats.depth = first_depth + len(chosen)
+                stats.branch(best)
+            cover(links, col)
+            node = down[col]
+
+        # backtrack while the current column has no rows left to try
+        while node == col:
+            if col:
+                uncover(links, col)
+            if not chosen:
+                if stats is not None:
+                    stats.depth = first_depth
+                return
+            node = chosen.pop()
+            if stats is not None:
+                stats.backtracks += 1
+            j = left[node]
+            while j != node:
+                uncover(links, column[j])
+                j = left[j]
+            col = column[node]
+            node = down[node]
+
+        chosen.append(node)
+        if stats is not None:
+            stats.nodes += 1
+        j = right[node]
+        while j != node:
+            cover(links, column[j])
+            j = right[j]
+
+
+def solve(grid, geometry=DIAGONAL, stats=None):
+    """Find the solution to a Sudoku puzzle using dancing links
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid.
+
+        Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    geometry(Geometry)
+        the geometry of the board
+
+    stats(SolverStats)
+        if given, the search nodes and backtracks are added to it
+
+    Returns
+    -------
+    dict or False
+        The dictionary representation of the final sudoku grid or False if no solution exists.
+    """
+    values = geometry.grid2values(grid)
+    links = build_links(geometry).copy()
+    n = len(geometry.digits)
+    right, column = links.right, links.column
+    for box, digits in enumerate(values[box] for box in geometry.boxes):
+        if len(digits) > 1:
+            continue
+        node = links.first[box * n + geometry.digits.index(digits)]
+        cols = [column[node]]
+        j = right[node]
+        while j != node:
+            cols.append(column[j])
+            j = right[j]
+        # a column is already covered if an earlier clue conflicts with this one
+        if any(links.right[links.left[col]] != col for col in cols):
+            return False
+        for col in cols:
+            cover(links, col)
+
+    for rows in exact_covers(links, stats):
+        for r in rows:
+            values[geometry.boxes[r // n]] = geometry.digits[r % n]
+        return values
+    return False
@@ -0,0 +1,212 @@
+"""Generate Sudoku puzzles that have exactly one solution
+
+A puzzle is made in two steps. First a complete grid is filled by a search
+that tries the digits of each box in random order. Then clues are removed
+one at a time in random order. Since the solution is known, removing the
+clue of a box keeps the puzzle unique exactly when the puzzle with that
+clue's digit forbidden in the box has no solution, so each removal costs a
+single failing search instead of counting solutions from scratch. Removal
+stops at the target clue count, or when no clue can be removed without
+allowing a second solution.
+
+Example:
+
+    python generator.py -n 100 --clues 24 -j 4 -o puzzles.txt
+"""
+import argparse
+import random
+import sys
+
+from collections import Counter, namedtuple
+from multiprocessing import Pool
+
+import bitboard
+from bitboard import DEFAULT_STRATEGIES, STRATEGIES
+from geometry import get_geometry
+from stats import SolverStats
+
+
+Puzzle = namedtuple("Puzzle", "grid solution clues difficulty nodes")
+
+EXTRA_STRATEGIES = tuple(name for name in STRATEGIES if name not in DEFAULT_STRATEGIES)
+
+
+def fill_board(board, rng, geometry, units=None):
+    """Complete a board with a depth first search that tries digits in random order
+
+    Parameters
+    ----------
+    board(list)
+        a list of integer masks; the list is modified in place
+
+    rng(random.Random)
+        the source of randomness
+
+    geometry(Geometry)
+        the geometry of the board
+
+    units(iterable)
+        indices of the units to propagate before searching (see `bitboard.propagate`)
+
+    Returns
+    -------
+    list or False
+        A solved board, or False if the board has no solution
+    """
+    board = bitboard.propagate(board, units, None, geometry)
+    if not board:
+        return False
+    search_idx = bitboard.select_box(board, geometry)
+    if search_idx is None:
+        return board
+    bits = [bit for bit in geometry.bit.values() if board[search_idx] & bit]
+    rng.shuffle(bits)
+    for bit in bits:
+        child = board[:]
+        child[search_idx] = bit
+        child = fill_board(child, rng, geometry, geometry.box_units[search_idx])
+        if child:
+            return child
+    return False
+
+
+def rate(grid, geometry):
+    """Estimate how hard a puzzle is from the work needed to solve it
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid
+
+    geometry(Geometry)
+        the geometry of the puzzle
+
+    Returns
+    -------
+    tuple
+        The difficulty and the number of search nodes `bitboard.solve` needs.
+        The difficulty is 'easy' if propagation alone solves the puzzle,
+        'medium' if the extra strategies in `bitboard.STRATEGIES` are needed
+        as well, and 'hard' if it cannot be solved without search
+    """
+    stats = SolverStats()
+    bitboard.solve(grid, geometry=geometry, stats=stats)
+    if not stats.nodes:
+        return 'easy', 0
+    extra_stats = SolverStats()
+    bitboard.solve(grid, geometry=geometry, extra=EXTRA_STRATEGIES, stats=extra_stats)
+    return ('medium' if not extra_stats.nodes else 'hard'), stats.nodes
+
+
+def generate(seed=None, clues=0, geometry=bitboard.DIAGONAL):
+    """Generate one puzzle with a unique solution
+
+    Parameters
+    ----------
+    seed(int)
+        the seed of the random number generator; the same seed, clue count
+        and geometry always give the same puzzle
+
+    clues(int)
+        the number of clues to stop at; clues are removed until the puzzle is
+        minimal if this is lower than what the grid allows
+
+    geometry(Geometry)
+        the geometry of the puzzle
+
+    Returns
+    -------
+    Puzzle
+        The grid, its solution, the number of clues and the estimate of `rate`
+    """
+    rng = random.Random(seed)
+    solution = fill_board([geometry.full] * len(geometry.boxes), rng, geometry)
+    puzzle = solution[:]
+    remaining = len(puzzle)
+    order = list(range(len(puzzle)))
+    rng.shuffle(order)
+    for idx in order:
+        if remaining <= clues:
+            break
+        # the puzzle stays unique if the box cannot hold any other digit
+        board = puzzle[:]
+        board[idx] = geometry.full & ~solution[idx]
+        if not bitboard.search(board, geometry.box_units[idx], geometry):
+            puzzle[idx] = geometry.full
+            remaining -= 1
+
+    grid = ''.join(geometry.mask2digits(mask) if geometry.solved[mask] else '.' for mask in puzzle)
+    difficulty, nodes = rate(grid, geometry)
+    return Puzzle(grid, ''.join(map(geometry.mask2digits, solution)), remaining, difficulty, nodes)
+
+
+def _generate(args):
+    seed, clues, size, diagonal = args
+    return generate(seed, clues, get_geometry(size, diagonal))
+
+
+def generate_many(count, seed=None, clues=0, geometry=bitboard.DIAGONAL, processes=None):
+    """Generate puzzles, in parallel if more than one process is requested
+
+    Parameters
+    ----------
+    count(int)
+        the number of puzzles
+
+    seed(int)
+        puzzle i is generated with seed ``seed + i``, so a run can be repeated;
+        if None, a random starting seed is chosen
+
+    clues(int)
+        the target number of clues (see `generate`)
+
+    geometry(Geometry)
+        the geometry of the puzzles
+
+    processes(int)
+        the number of worker processes; None or 1 generates the puzzles in the
+        current process
+
+    Yields
+    ------
+    Puzzle
+        The puzzles in seed order
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    jobs = [(seed + i, clues, geometry.size, geometry.diagonal) for i in range(count)]
+    if not processes or processes == 1:
+        yield from map(_generate, jobs)
+        return
+    with Pool(processes) as pool:
+        yield from pool.imap(_generate, jobs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate Sudoku puzzles with a unique solution " +
+        "and write one grid per line.")
+    parser.add_argument('-n', '--count', type=int, default=10,
+                        help="Number of puzzles to generate (default: 10)")
+    parser.add_argument('--clues', type=int, default=0,
+                        help="Stop removing clues at this count (default: 0, remove as many as possible)")
+    parser.add_argument('--size', type=int, default=3,
+                        help="Width of a square; 3 gives 9×9 puzzles (default: 3)")
+    parser.add_argument('--standard', action='store_true',
+                        help="Generate standard puzzles instead of diagonal Sudoku")
+    parser.add_argument('--seed', type=int, help="Seed for the first puzzle")
+    parser.add_argument('-j', '--processes', type=int, default=1,
+                        help="Number of worker processes (default: 1)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="File to write the puzzles to ('-' writes to stdout)")
+    args = parser.parse_args()
+
+    geometry = get_geometry(args.size, not args.standard)
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w')
+    difficulties = Counter()
+    with outfile:
+        for puzzle in generate_many(args.count, args.seed, args.clues, geometry, args.processes):
+            outfile.write(puzzle.grid + '\n')
+            difficulties[puzzle.difficulty] += 1
+    print("Generated {} puzzles: {}".format(args.count, ", ".join(
+        "{} {}".format(difficulties[level], level) for level in ('easy', 'medium', 'hard'))),
+        file=sys.stderr)
@@ -0,0 +1,170 @@
+"""Board geometry for N²×N² Sudoku puzzles
+
+A `Geometry` holds everything that depends only on the shape of the board:
+the row and column labels, the box names, the units (rows, columns, squares
+and optionally the two diagonals) and the peers of every box. It also holds
+the index and bitmask tables used by the `bitboard` engine. Building these
+tables is the expensive part, so use `get_geometry` to share one instance per
+(size, diagonal) combination instead of creating new instances directly.
+
+Box names follow `utils`: a row letter followed by a column number, e.g.,
+'A1' or 'P16'. Digits are '1'-'9' followed by letters, so a 16×16 board uses
+'123456789ABCDEFG'.
+"""
+from functools import lru_cache
+
+from utils import cross, extract_units, extract_peers
+
+
+ROW_LABELS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+DIGIT_SYMBOLS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+class PopCount(dict):
+    """Lazily filled table of the number of set bits in a mask
+
+    Used instead of a list for boards with more than 16 digits, where a full
+    table would need 2**25 entries.
+    """
+    def __missing__(self, mask):
+        count = self[mask] = bin(mask).count('1')
+        return count
+
+
+class SingleDigit(dict):
+    """Table of the masks that hold exactly one digit, for the same boards as `PopCount`"""
+    def __missing__(self, mask):
+        return False
+
+
+class Geometry:
+    """Units, peers and lookup tables for a Sudoku board with size×size squares
+
+    Attributes
+    ----------
+    size : int
+        The width of a square, e.g., 3 for a standard 9×9 board
+
+    diagonal : bool
+        Whether the two main diagonals are units
+
+    rows, cols : list
+        The row and column labels; box names are row + col
+
+    digits : str
+        The symbols that can be placed in a box, in bit order
+
+    boxes : list
+        The box names in row-major order
+
+    unitlist, units, peers
+        The same structures as in solution.py, for this geometry
+
+    unit_indices, peer_indices, box_units : list
+        The units and peers as tuples of indices into `boxes`, and the indices
+        into `unit_indices` of the units that contain each box
+
+    row_units, column_units, square_units : list
+        The rows, columns and squares from `unit_indices`; the boxes of a row
+        are in column order and the boxes of a column are in row order
+
+    intersections : list
+        A (square, line, common) tuple of box index tuples for every square and
+        every row, column or diagonal that shares at least two boxes with it
+
+    full, bit, count, solved
+        The mask with every digit set, the mask of each digit, and tables of
+        the number of digits in a mask and whether it holds exactly one digit
+    """
+    def __init__(self, size=3, diagonal=True):
+        n = size * size
+        if n > len(DIGIT_SYMBOLS):
+            raise ValueError("Boards with more than {} digits are not supported".format(len(DIGIT_SYMBOLS)))
+        self.size = size
+        self.diagonal = diagonal
+        self.rows = list(ROW_LABELS[:n])
+        self.cols = [str(c) for c in range(1, n + 1)]
+        self.digits = DIGIT_SYMBOLS[:n]
+        self.boxes = cross(self.rows, self.cols)
+
+        bands = [self.rows[i:i + size] for i in range(0, n, size)]
+        stacks = [self.cols[i:i + size] for i in range(0, n, size)]
+        row_units = [cross([r], self.cols) for r in self.rows]
+        column_units = [cross(self.rows, [c]) for c in self.cols]
+        square_units = [cross(rs, cs) for rs in bands for cs in stacks]
+        self.unitlist = row_units + column_units + square_units
+        if diagonal:
+            self.unitlist.append([r + c for r, c in zip(self.rows, self.cols)])
+            self.unitlist.append([r + c for r, c in zip(self.rows, reversed(self.cols))])
+        self.units = extract_units(self.unitlist, self.boxes)
+        self.peers = extract_peers(self.units, self.boxes)
+
+        self.box_index = {box: idx for idx, box in enumerate(self.boxes)}
+        self.unit_indices = [tuple(self.box_index[box] for box in unit) for unit in self.unitlist]
+        self.peer_indices = [tuple(sorted(self.box_index[peer] for peer in self.peers[box]))
+                             for box in self.boxes]
+        self.box_units = [[] for _ in self.boxes]
+        for u, unit in enumerate(self.unit_indices):
+            for idx in unit:
+                self.box_units[idx].append(u)
+        self.box_units = [tuple(units) for units in self.box_units]
+        self.row_units = self.unit_indices[:n]
+        self.column_units = self.unit_indices[n:2 * n]
+        self.square_units = self.unit_indices[2 * n:3 * n]
+        lines = self.row_units + self.column_units + self.unit_indices[3 * n:]
+        self.intersections = []
+        for square in self.square_units:
+            members = set(square)
+            for line in lines:
+                common = tuple(idx for idx in line if idx in members)
+                if len(common) > 1:
+                    self.intersections.append((square, line, common))
+
+        self.full = (1 << n) - 1
+        self.bit = {digit: 1 << idx for idx, digit in enumerate(self.digits)}
+        if n <= 16:
+            # the counts for masks with bit i set are the counts below 2**i plus one
+            self.count = [0]
+            for _ in range(n):
+                self.count += [count + 1 for count in self.count]
+            self.solved = [count == 1 for count in self.count]
+        else:
+            self.count = PopCount()
+            self.solved = SingleDigit((bit, True) for bit in self.bit.values())
+
+    def __repr__(self):
+        return "Geometry(size={}, diagonal={})".format(self.size, self.diagonal)
+
+    def mask2digits(self, mask):
+        """Return the digits of a mask as a string, e.g., 0b101 -> '13'"""
+        return ''.join(d for d in self.digits if mask & self.bit[d])
+
+    def grid2values(self, grid):
+        """Convert a grid string into a dict of {box: digits}, like `utils.grid2values`"""
+        if len(grid) != len(self.boxes):
+            raise ValueError("Expected a grid of {} characters, got {}".format(len(self.boxes), len(grid)))
+        return {box: self.digits if val in '.0' else val for val, box in zip(grid, self.boxes)}
+
+    def values2grid(self, values):
+        """Convert a dict of {box: digits} into a grid string, like `utils.values2grid`"""
+        return ''.join(values[box] if len(values[box]) == 1 else '.' for box in self.boxes)
+
+
+@lru_cache()
+def get_geometry(size=3, diagonal=True):
+    """Return the shared `Geometry` for boards with size×size squares
+
+    Parameters
+    ----------
+    size(int)
+        the width of a square; 2, 3, 4 and 5 give 4×4, 9×9, 16×16 and 25×25 boards
+
+    diagonal(bool)
+        whether the two main diagonals are units (as in diagonal Sudoku)
+
+    Returns
+    -------
+    Geometry
+        A geometry that is built once and reused by every later call
+    """
+    return Geometry(size, diagonal)
@@ -41,6 +41,23 @@ def AAfilledRoundedRect(surface,rect,color,radius=0.4):
 
     return surface.blit(rectangle,pos)
 
+_fonts = {}
+_tiles = {}
+
+def get_font(name='opensans', size=21):
+    """Return a shared font; looking up a system font is slow, so each is created once"""
+    if (name, size) not in _fonts:
+        _fonts[name, size] = pygame.font.SysFont(name, size)
+    return _fonts[name, size]
+
+def get_tile(color, size=(45, 40)):
+    """Return a shared transparent surface holding a rounded square of the given color"""
+    if (color, size) not in _tiles:
+        tile = Surface(size, SRCALPHA)
+        AAfilledRoundedRect(tile, (0, 0) + size, color)
+        _tiles[color, size] = tile
+    return _tiles[color, size]
+
 class SudokuSquare:
     """A sudoku square class."""
     def __init__(self, number=None, offsetX=0, offsetY=0, edit="Y", xLoc=0, yLoc=0):
@@ -51,7 +68,7 @@ class SudokuSquare:
             number = ""
             self.color = (255, 255, 255)
         # print("FONTS", pygame.font.get_fonts())
-        self.font = pygame.font.SysFont('opensans', 21)
+        self.font = get_font()
         self.text = self.font.render(number, 1, (255, 255, 255))
         self.textpos = self.text.get_rect()
         self.textpos = self.textpos.move(offsetX + 17, offsetY + 4)
@@ -70,12 +87,14 @@ class SudokuSquare:
         self.offsetX = offsetX
         self.offsetY = offsetY
 
-    def draw(self):
-        screen = pygame.display.get_surface()
-        AAfilledRoundedRect(screen, (self.offsetX, self.offsetY, 45, 40), self.color)
+    def draw(self, screen=None):
+        if screen is None:
+            screen = pygame.display.get_surface()
+        screen.blit(get_tile(self.color), (self.offsetX, self.offsetY))
 
         # screen.blit(self.collide, self.collideRect)
         screen.blit(self.text, self.textpos)
+        return Rect(self.offsetX, self.offsetY, 45, 40)
 
 
     def checkCollide(self, collision):
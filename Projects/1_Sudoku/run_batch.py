@@ -0,0 +1,91 @@
+import argparse
+import os
+import sys
+
+from timeit import default_timer as timer
+
+import bitboard
+import dlx
+import solution
+from utils import values2grid
+
+
+SOLVERS = {'dict': solution.solve, 'bitboard': bitboard.solve, 'dlx': dlx.solve}
+VALID_CHARACTERS = set('123456789.0')
+
+
+def read_grids(lines):
+    """Yield one 81 character grid for each non-empty line of the input
+
+    Blank lines and lines starting with '#' are skipped, and '0' is accepted
+    as an alternative to '.' for empty boxes. A ValueError naming the line is
+    raised for a line with the wrong length or a character that is not a
+    digit or an empty box.
+
+    Parameters
+    ----------
+    lines(iterable)
+        an iterable of strings, e.g., an open file
+
+    Yields
+    ------
+    string
+        a string representing a sudoku grid
+    """
+    for lineno, line in enumerate(lines, 1):
+        grid = line.strip()
+        if not grid or grid.startswith('#'):
+            continue
+        if len(grid) != 81:
+            raise ValueError("line {}: expected 81 characters, got {}".format(lineno, len(grid)))
+        invalid = set(grid) - VALID_CHARACTERS
+        if invalid:
+            raise ValueError("line {}: unexpected characters {!r}".format(lineno, ''.join(sorted(invalid))))
+        yield grid.replace('0', '.')
+
+
+def main(infile, outfile, solver, processes, chunksize):
+    start = timer()
+    solved = total = 0
+    if solver == 'numpy':
+        # numpy is only needed for this solver, so it is imported on demand
+        import vectorized
+        results = vectorized.solve_stream(read_grids(infile), chunksize=chunksize)
+    else:
+        results = solution.solve_many(read_grids(infile), SOLVERS[solver], processes, chunksize)
+    for result in results:
+        total += 1
+        if result:
+            solved += 1
+            outfile.write(values2grid(result))
+        # unsolvable puzzles leave an empty line to keep the output aligned with the input
+        outfile.write('\n')
+    elapsed = timer() - start
+    print("Solved {} of {} puzzles in {:.3f} seconds ({:.1f} puzzles/sec)".format(
+        solved, total, elapsed, total / elapsed if elapsed else 0.), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve diagonal Sudoku puzzles read one grid " +
+        "per line from a file or stdin, and write one solution per line.")
+    parser.add_argument('input', nargs='?', default='-',
+                        help="File containing one 81 character grid per line ('-' reads stdin)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="File to write the solutions to ('-' writes to stdout)")
+    parser.add_argument('-s', '--solver', choices=sorted(SOLVERS) + ['numpy'], default='bitboard',
+                        help="Solver engine to use; 'numpy' propagates a chunk of puzzles at a " +
+                        "time and ignores --processes (default: bitboard)")
+    parser.add_argument('-j', '--processes', type=int, default=1,
+                        help="Number of worker processes; 0 uses one per CPU (default: 1)")
+    parser.add_argument('-c', '--chunksize', type=int, default=64,
+                        help="Number of puzzles sent to a worker process, or propagated together " +
+                        "by the numpy solver, at a time (default: 64)")
+    args = parser.parse_args()
+
+    infile = sys.stdin if args.input == '-' else open(args.input)
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w')
+    with infile, outfile:
+        try:
+            main(infile, outfile, args.solver, args.processes or os.cpu_count(), args.chunksize)
+        except ValueError as err:
+            parser.exit(2, "error: {}\n".format(err))
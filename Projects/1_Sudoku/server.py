@@ -0,0 +1,193 @@
+"""Serve Sudoku solutions over a local socket
+
+Clients send one grid per line and get one line back per grid, in the same
+order: the solved grid, an empty line if the puzzle has no solution, or a
+line starting with 'error:' if the grid is malformed. Sending 'stats'
+returns the cache counters as a JSON object.
+
+Solving runs in a process pool so the event loop stays responsive. Results
+are kept in a size-bounded LRU cache, and a grid that is already being
+solved is not submitted again: later requests for it wait for the first one.
+Grids are looked up by their `canonical.canonical_form`, so a puzzle with
+relabeled digits or with rows and columns moved by a symmetry of the board
+is answered from the solution of the puzzle it is equivalent to.
+
+Example:
+
+    python server.py --port 8765 -j 4
+    printf '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3\\n' | nc localhost 8765
+"""
+import argparse
+import asyncio
+import json
+import os
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from canonical import canonical_form
+from run_batch import read_grids
+from utils import values2grid
+
+
+def solve_grid(grid):
+    """Solve one grid and return the solved grid string, or '' if there is no solution"""
+    import bitboard
+    values = bitboard.solve(grid)
+    return values2grid(values) if values else ''
+
+
+class SolverService:
+    """Solves grids in an executor with request coalescing and an LRU cache
+
+    Attributes
+    ----------
+    cache : OrderedDict
+        Mapping from a cache key to its result, from least to most recently used
+
+    inflight : dict
+        Mapping from the key of a grid that is being solved to the future of its result
+
+    hits, misses, coalesced : int
+        The number of requests answered from the cache, sent to the executor,
+        and attached to a request that was already in flight
+    """
+    def __init__(self, executor=None, solver=solve_grid, cache_size=10000, canonical=True):
+        """
+        Parameters
+        ----------
+        executor(concurrent.futures.Executor)
+            the executor to solve grids in; a process pool with one worker
+            per CPU is created if None
+
+        solver(callable)
+            a function mapping a grid string to a result string; it must be
+            picklable for a process pool
+
+        cache_size(int)
+            the maximum number of results kept in the cache
+
+        canonical(bool)
+            whether grids are solved and cached in canonical form, so that
+            equivalent puzzles share one entry; if False, only identical
+            grids do
+        """
+        self.executor = executor if executor is not None else ProcessPoolExecutor()
+        self.solver = solver
+        self.cache_size = cache_size
+        self.canonical = canonical
+        self.cache = OrderedDict()
+        self.inflight = {}
+        self.hits = self.misses = self.coalesced = 0
+
+    def key(self, grid):
+        """Return the cache key of a grid and the `canonical.Transform` that maps it to the key, or None"""
+        if self.canonical:
+            return canonical_form(grid)
+        return grid.replace('0', '.'), None
+
+    async def solve(self, grid):
+        """Return the result of solving a grid, computing it at most once at a time"""
+        key, transform = self.key(grid)
+        result = await self._solve_key(key)
+        if transform is not None and result:
+            result = transform.restore(result)
+        return result
+
+    async def _solve_key(self, key):
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        if key in self.inflight:
+            self.coalesced += 1
+            # shield the shared future so that one cancelled client does not cancel the others
+            return await asyncio.shield(self.inflight[key])
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        future = self.inflight[key] = loop.run_in_executor(self.executor, self.solver, key)
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            del self.inflight[key]
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    def stats(self):
+        """Return the cache counters as a dict"""
+        return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced,
+                'cached': len(self.cache), 'inflight': len(self.inflight)}
+
+    async def respond(self, line):
+        """Return the response line for one request line"""
+        if line == 'stats':
+            return json.dumps(self.stats())
+        try:
+            grid, = read_grids([line])
+        except ValueError as err:
+            return "error: {}".format(err)
+        try:
+            return await self.solve(grid)
+        except Exception as err:
+            return "error: the solver failed: {!r}".format(err)
+
+    async def handle(self, reader, writer):
+        """Answer the requests of one connection in order, solving them concurrently"""
+        responses = asyncio.Queue()
+
+        async def write_responses():
+            while True:
+                task = await responses.get()
+                if task is None:
+                    break
+                writer.write((await task + '\n').encode())
+                await writer.drain()
+
+        writing = asyncio.ensure_future(write_responses())
+        try:
+            async for line in reader:
+                line = line.decode().strip()
+                if line:
+                    responses.put_nowait(asyncio.ensure_future(self.respond(line)))
+            responses.put_nowait(None)
+            await writing
+        finally:
+            writing.cancel()
+            writer.close()
+
+
+async def serve(service, host='127.0.0.1', port=8765, path=None):
+    """Serve requests until cancelled, on a TCP port or on a Unix socket if `path` is given"""
+    # start the workers before listening: a worker forked while a client is connected would keep
+    # a copy of its socket, and the client would not see the connection close
+    await asyncio.get_running_loop().run_in_executor(service.executor, int)
+    if path is not None:
+        server = await asyncio.start_unix_server(service.handle, path)
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve diagonal Sudoku solutions over a local socket.")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="TCP port to listen on (default: 8765)")
+    parser.add_argument('--unix', help="Listen on this Unix socket path instead of a TCP port")
+    parser.add_argument('-j', '--processes', type=int, default=0,
+                        help="Number of solver processes; 0 uses one per CPU (default: 0)")
+    parser.add_argument('--cache-size', type=int, default=10000,
+                        help="Number of solutions kept in the cache (default: 10000)")
+    parser.add_argument('--exact-keys', action='store_true',
+                        help="Only answer identical grids from the cache, instead of equivalent ones")
+    args = parser.parse_args()
+
+    with ProcessPoolExecutor(args.processes or os.cpu_count()) as executor:
+        service = SolverService(executor, cache_size=args.cache_size, canonical=not args.exact_keys)
+        try:
+            asyncio.run(serve(service, args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
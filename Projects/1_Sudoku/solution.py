@@ -1,23 +1,21 @@
 
-from utils import *
-
+from itertools import islice
+from timeit import default_timer as timer
 
-row_units = [cross(r, cols) for r in rows]
-column_units = [cross(rows, c) for c in cols]
-square_units = [cross(rs, cs) for rs in ('ABC','DEF','GHI') for cs in ('123','456','789')]
-unitlist = row_units + column_units + square_units
-
-# TODO: Update the unit list to add the new diagonal units
-unitlist.append([r+c for r, c in zip(rows, cols)])
-unitlist.append([r+c for r, c in zip(rows, list(reversed(cols)))])
+from geometry import get_geometry
+from utils import *
 
 
-# Must be called after all units (including diagonals) are added to the unitlist
-units = extract_units(unitlist, boxes)
-peers = extract_peers(units, boxes)
+# the 9×9 diagonal tables are shared with the bitboard and dlx engines through get_geometry,
+# so a process builds them once
+DIAGONAL = get_geometry(3, diagonal=True)
+unitlist = DIAGONAL.unitlist
+row_units, column_units, square_units = unitlist[:9], unitlist[9:18], unitlist[18:27]
+units = DIAGONAL.units
+peers = DIAGONAL.peers
 
 
-def naked_twins(values):
+def naked_twins(values, log=None):
     """Eliminate values using the naked twins strategy.
 
     The naked twins strategy says that if you have two or more unallocated boxes
@@ -30,6 +28,9 @@ def naked_twins(values):
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    log(AssignmentLog)
+        if given, every box assignment is recorded in this log (see `utils.AssignmentLog`)
+
     Returns
     -------
     dict
@@ -68,8 +69,10 @@ def naked_twins(values):
             if len(pair_dict[pair])>=2:
                 reserved_boxes = pair_dict[pair][:2]
                 for box in set(unit)-set(reserved_boxes):
-                    values[box] = values[box].replace(pair[0],'')
-                    values[box] = values[box].replace(pair[1],'')
+                    if log is None:
+                        values[box] = values[box].replace(pair[0],'').replace(pair[1],'')
+                    else:
+                        assign_value(values, box, values[box].replace(pair[0],'').replace(pair[1],''), log)
                     pass
                 pass
             pass
@@ -77,7 +80,7 @@ def naked_twins(values):
     return values
 
 
-def eliminate(values):
+def eliminate(values, log=None):
     """Apply the eliminate strategy to a Sudoku puzzle
 
     The eliminate strategy says that if a box has a value assigned, then none
@@ -88,6 +91,9 @@ def eliminate(values):
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    log(AssignmentLog)
+        if given, every box assignment is recorded in this log (see `utils.AssignmentLog`)
+
     Returns
     -------
     dict
@@ -98,14 +104,17 @@ def eliminate(values):
         if 1==len(values[key]):
             neighbors = peers[key]
             for neighbor in neighbors:
-                values[neighbor] = values[neighbor].replace(values[key], '')
+                if log is None:
+                    values[neighbor] = values[neighbor].replace(values[key], '')
+                else:
+                    assign_value(values, neighbor, values[neighbor].replace(values[key], ''), log)
                 pass
             pass
         pass
     return values
 
 
-def only_choice(values):
+def only_choice(values, log=None):
     """Apply the only choice strategy to a Sudoku puzzle
 
     The only choice strategy says that if only one box in a unit allows a certain
@@ -116,6 +125,9 @@ def only_choice(values):
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    log(AssignmentLog)
+        if given, every box assignment is recorded in this log (see `utils.AssignmentLog`)
+
     Returns
     -------
     dict
@@ -142,7 +154,10 @@ def only_choice(values):
             if frequency_table[number] == 1:
                 for box in unit:
                     if number in values[box]:
-                        values[box] = number
+                        if log is None:
+                            values[box] = number
+                        else:
+                            assign_value(values, box, number, log)
                         break;
                     pass
                 pass
@@ -151,7 +166,22 @@ def only_choice(values):
     return values
 
 
-def reduce_puzzle(values):
+def _count_candidates(values):
+    """Return the total number of candidate digits left in all boxes"""
+    return sum(len(digits) for digits in values.values())
+
+
+def _run_strategy(stats, name, strategy, values, log=None):
+    """Apply a strategy and record the number of candidates it removed and its time in `stats`"""
+    before = _count_candidates(values)
+    start = timer()
+    values = strategy(values, log)
+    seconds = timer() - start
+    stats.record(name, before - _count_candidates(values), seconds)
+    return values
+
+
+def reduce_puzzle(values, log=None, stats=None):
     """Reduce a Sudoku puzzle by repeatedly applying all constraint strategies
 
     Parameters
@@ -159,6 +189,14 @@ def reduce_puzzle(values):
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    log(AssignmentLog)
+        if given, every box assignment is recorded in this log (see `utils.AssignmentLog`)
+
+    stats(SolverStats)
+        if given, every strategy application is recorded in it under the name of
+        the strategy, and every pass of the loop under 'propagate', with the
+        number of candidates removed and the time taken (see `stats.SolverStats`)
+
     Returns
     -------
     dict or False
@@ -171,14 +209,22 @@ def reduce_puzzle(values):
         # Check how many boxes have a determined value
         solved_values_before = len([box for box in values.keys() if len(values[box]) == 1])
 
-        # Your code here: Use the Eliminate Strategy
-        values = eliminate(values)
+        if stats is None:
+            # Your code here: Use the Eliminate Strategy
+            values = eliminate(values, log)
 
-        # Your code here: Use the Only Choice Strategy
-        values = only_choice(values)
+            # Your code here: Use the Only Choice Strategy
+            values = only_choice(values, log)
 
-        # Use naked pair Strategy
-        values = naked_twins(values)
+            # Use naked pair Strategy
+            values = naked_twins(values, log)
+        else:
+            start = timer()
+            before = _count_candidates(values)
+            for name, strategy in (('eliminate', eliminate), ('only_choice', only_choice),
+                                   ('naked_twins', naked_twins)):
+                values = _run_strategy(stats, name, strategy, values, log)
+            stats.record('propagate', before - _count_candidates(values), timer() - start)
 
         # Check how many boxes have a determined value, to compare
         solved_values_after = len([box for box in values.keys() if len(values[box]) == 1])
@@ -190,7 +236,7 @@ def reduce_puzzle(values):
     return values
 
 
-def search(values):
+def search(values, log=None, stats=None):
     """Apply depth first search to solve Sudoku puzzles in order to solve puzzles
     that cannot be solved by repeated reduction alone.
 
@@ -199,6 +245,13 @@ def search(values):
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    log(AssignmentLog)
+        if given, every box assignment is recorded in this log (see `utils.AssignmentLog`)
+
+    stats(SolverStats)
+        if given, the strategies applied by `reduce_puzzle` and the size and
+        shape of the search tree are recorded in it
+
     Returns
     -------
     dict or False
@@ -211,7 +264,7 @@ def search(values):
     """
     # TODO: Copy your code from the classroom to complete this function
     # First, reduce the puzzle using the previous function
-    values = reduce_puzzle(values)
+    values = reduce_puzzle(values, log, stats)
     if not values:
         return False
 
@@ -231,19 +284,33 @@ def search(values):
 
     # Now use recursion to solve each one of the resulting sudokus, and if one returns a value (not False), return that answer!
     digits = values[search_box]
+    branch = log.head if log is not None else None
+    if stats is not None:
+        stats.branch(len(digits))
     for digit in digits:
+        if log is not None:
+            # assignments made by earlier (failed) digits are not ancestors of this branch
+            log.head = branch
         temp = values.copy()
-        temp[search_box] = digit
-        temp = search(temp)
+        assign_value(temp, search_box, digit, log)
+        if stats is None:
+            temp = search(temp, log)
+        else:
+            stats.nodes += 1
+            stats.depth += 1
+            temp = search(temp, log, stats)
+            stats.depth -= 1
         if temp:
             return temp
+        if stats is not None:
+            stats.backtracks += 1
         pass
 
     # If you're stuck, see the solution.py tab!
     return False
 
 
-def solve(grid):
+def solve(grid, log=None, method='search', stats=None):
     """Find the solution to a Sudoku puzzle using search and constraint propagation
 
     Parameters
@@ -253,20 +320,94 @@ def solve(grid):
 
         Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
 
+    log(AssignmentLog)
+        if given, the assignments made while solving are recorded in this log so
+        that they can be replayed with `utils.reconstruct`; use one log per puzzle
+
+    method(string)
+        the solver backend: 'search' (this module), 'bitboard' or 'trail' (the
+        bitmask engine with copying or undo-trail search), or 'dlx' (an exact
+        cover search with dancing links, whose run time depends much less on
+        how hard the puzzle is for constraint propagation); a log can only be
+        recorded with 'search'
+
+    stats(SolverStats)
+        if given, the work done by every strategy and the size and shape of
+        the search tree are recorded in it; with 'search', the strategies are
+        'eliminate', 'only_choice' and 'naked_twins', and every pass of
+        `reduce_puzzle` is recorded as 'propagate' (see `stats.SolverStats`)
+
     Returns
     -------
     dict or False
         The dictionary representation of the final sudoku grid or False if no solution exists.
     """
+    if method not in ('search', 'bitboard', 'trail', 'dlx'):
+        raise ValueError("Unknown solver method: {!r}".format(method))
+    if log is not None and method != 'search':
+        raise ValueError("Assignments can only be logged with method='search'")
+    # the other engines are imported on first use to keep importing this module fast
+    if method == 'dlx':
+        import dlx
+        return dlx.solve(grid, stats=stats)
+    if method != 'search':
+        import bitboard
+        return bitboard.solve(grid, trail=(method == 'trail'), stats=stats)
     values = grid2values(grid)
-    values = search(values)
+    values = search(values, log, stats)
     return values
 
 
+def solve_many(grids, solver=None, processes=None, chunksize=64):
+    """Solve a stream of Sudoku puzzles, yielding each result in input order
+
+    Puzzles are consumed lazily, so arbitrarily large inputs can be streamed
+    without loading them into memory. When more than one process is requested
+    the puzzles are fanned out to a `multiprocessing` pool a few chunks per
+    worker at a time, which keeps memory use bounded.
+
+    Parameters
+    ----------
+    grids(iterable)
+        an iterable of strings representing sudoku grids
+
+    solver(callable)
+        a function mapping one grid string to its solution (the default is
+        `solve`); it must be importable by worker processes when processes > 1
+
+    processes(int)
+        the number of worker processes; None or 1 solves the puzzles in the
+        current process
+
+    chunksize(int)
+        the number of puzzles sent to a worker process at a time
+
+    Yields
+    ------
+    dict or False
+        The result of ``solver(grid)`` for each grid
+    """
+    solver = solver or solve
+    if not processes or processes == 1:
+        for grid in grids:
+            yield solver(grid)
+        return
+
+    from multiprocessing import Pool
+    grids = iter(grids)
+    with Pool(processes) as pool:
+        while True:
+            window = list(islice(grids, 4 * processes * chunksize))
+            if not window:
+                break
+            yield from pool.imap(solver, window, chunksize)
+
+
 if __name__ == "__main__":
     diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
     display(grid2values(diag_sudoku_grid))
-    result = solve(diag_sudoku_grid)
+    history = AssignmentLog()
+    result = solve(diag_sudoku_grid, log=history)
     display(result)
 
     try:
@@ -0,0 +1,118 @@
+"""Counters collected while solving Sudoku puzzles
+
+A `SolverStats` instance can be passed to `solution.solve` or to the solvers
+in `bitboard` and `dlx` to find out how much work each strategy does and
+what the search tree looked like. Collecting stats is optional; the solvers
+skip all bookkeeping when no instance is given.
+"""
+from timeit import default_timer as timer
+
+
+class StrategyStats:
+    """Totals for one strategy
+
+    Attributes
+    ----------
+    calls : int
+        The number of times the strategy was applied
+
+    removed : int
+        The total number of candidates it removed
+
+    seconds : float
+        The total time spent in the strategy
+    """
+    __slots__ = ('calls', 'removed', 'seconds')
+
+    def __init__(self):
+        self.calls = 0
+        self.removed = 0
+        self.seconds = 0.
+
+    def __repr__(self):
+        return "StrategyStats(calls={}, removed={}, seconds={:.6f})".format(
+            self.calls, self.removed, self.seconds)
+
+
+class SolverStats:
+    """Search and per-strategy counters for one or more solves
+
+    Attributes
+    ----------
+    nodes : int
+        The number of branches entered by the search, i.e., the number of
+        times a box was assigned a guessed digit
+
+    backtracks : int
+        The number of branches that led to a contradiction
+
+    depth, max_depth : int
+        The number of guesses on the path the search is currently exploring,
+        and the largest number of guesses on any path it explored
+
+    branchings, choices : int
+        The number of boxes (or exact cover columns) the search branched on,
+        and the total number of digits (or rows) it could try there
+
+    strategies : dict
+        Mapping from a strategy name to its `StrategyStats`, in the order the
+        strategies were first applied
+    """
+    def __init__(self):
+        self.nodes = 0
+        self.backtracks = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.branchings = 0
+        self.choices = 0
+        self.strategies = {}
+
+    def record(self, name, removed, seconds):
+        """Add one application of a strategy to the totals"""
+        entry = self.strategies.get(name)
+        if entry is None:
+            entry = self.strategies[name] = StrategyStats()
+        entry.calls += 1
+        entry.removed += removed
+        entry.seconds += seconds
+
+    def run(self, name, strategy, *args):
+        """Apply a strategy that returns its removed count and record the result"""
+        start = timer()
+        removed = strategy(*args)
+        self.record(name, removed, timer() - start)
+        return removed
+
+    def branch(self, width):
+        """Record that the search branches at the current depth with `width` alternatives to try"""
+        self.branchings += 1
+        self.choices += width
+        if self.depth >= self.max_depth:
+            self.max_depth = self.depth + 1
+
+    def branch_factor(self):
+        """Return the mean number of alternatives at the branching points of the search"""
+        return self.choices / self.branchings if self.branchings else 0.
+
+    def passes(self, name='propagate'):
+        """Return the number of times a strategy was applied, e.g., propagation passes"""
+        entry = self.strategies.get(name)
+        return entry.calls if entry else 0
+
+    def as_dict(self):
+        """Return the counters as plain dicts, e.g., for a JSON report"""
+        return {'nodes': self.nodes, 'backtracks': self.backtracks, 'max_depth': self.max_depth,
+                'branch_factor': self.branch_factor(),
+                'strategies': {name: {'calls': entry.calls, 'removed': entry.removed,
+                                      'seconds': entry.seconds}
+                               for name, entry in self.strategies.items()}}
+
+    def report(self):
+        """Return a table with one line per strategy"""
+        lines = ["Nodes: {}, backtracks: {}, max depth: {}, branch factor: {:.2f}".format(
+                     self.nodes, self.backtracks, self.max_depth, self.branch_factor()),
+                 "{:<20} {:>8} {:>10} {:>10}".format("Strategy", "Calls", "Removed", "Seconds")]
+        for name, entry in self.strategies.items():
+            lines.append("{:<20} {:>8} {:>10} {:>10.4f}".format(
+                name, entry.calls, entry.removed, entry.seconds))
+        return "\n".join(lines)
@@ -0,0 +1,29 @@
+import unittest
+
+import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_corpora(self):
+        for name in benchmark.CORPORA:
+            grids, geometry = benchmark.load_corpus(name)
+            self.assertTrue(grids, "The {} corpus is empty".format(name))
+            self.assertEqual(geometry.diagonal, name == 'diagonal')
+
+    def test_run_benchmark(self):
+        report = benchmark.run_benchmark(['easy', 'hard'], ['trail', 'dlx'], ['basic', 'locked'])
+        self.assertEqual(len(report['results']), 6)
+        for result in report['results']:
+            self.assertEqual(result['solved'], result['puzzles'])
+            if result['corpus'] == 'easy' and result['mode'] == 'trail':
+                self.assertEqual(result['nodes'], 0)
+
+    def test_find_regressions(self):
+        baseline = {'results': [{'corpus': 'easy', 'mode': 'dlx', 'mix': 'basic', 'seconds': 1.}]}
+        report = {'results': [{'corpus': 'easy', 'mode': 'dlx', 'mix': 'basic', 'seconds': 2.}]}
+        self.assertEqual(len(benchmark.find_regressions(report, baseline, 1.5)), 1)
+        self.assertEqual(benchmark.find_regressions(report, baseline, 2.5), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+
+import bitboard
+import solution
+from geometry import get_geometry
+from stats import SolverStats
+from utils import grid2values
+
+from tests import test_solution
+
+
+class TestBitboardStrategies(unittest.TestCase):
+    twins = test_solution.TestNakedTwins
+
+    def test_round_trip(self):
+        values = dict(self.twins.before_naked_twins_1)
+        self.assertEqual(bitboard.board2values(bitboard.values2board(values)), values)
+
+    def test_naked_twins(self):
+        for before, expected in [(self.twins.before_naked_twins_1, self.twins.possible_solutions_1),
+                                 (self.twins.before_naked_twins_2, self.twins.possible_solutions_2)]:
+            board = bitboard.values2board(before)
+            bitboard.naked_twins(board)
+            self.assertTrue(bitboard.board2values(board) in expected,
+                            "The bitmask naked_twins produced an unexpected board.")
+
+    def test_eliminate_matches_dictionary_solver(self):
+        values = grid2values(test_solution.TestDiagonalSudoku.diagonal_grid)
+        board = bitboard.values2board(values)
+        bitboard.eliminate(board)
+        self.assertEqual(bitboard.board2values(board), solution.eliminate(dict(values)))
+
+
+class TestPropagate(unittest.TestCase):
+    diagonal_grid = test_solution.TestDiagonalSudoku.diagonal_grid
+
+    def test_matches_reduce_puzzle(self):
+        board = bitboard.values2board(grid2values(self.diagonal_grid))
+        self.assertEqual(bitboard.propagate(board[:]), bitboard.reduce_puzzle(board[:]))
+
+    def test_contradiction(self):
+        # the only box left in the first row cannot hold the missing digit 9
+        board = bitboard.values2board(grid2values('12345678.' + '.' * 72))
+        board[8] = bitboard.DIAGONAL.full & ~bitboard.DIAGONAL.bit['9']
+        self.assertFalse(bitboard.propagate(board, [0]))
+
+
+class TestExtraStrategies(unittest.TestCase):
+    # a hard standard (non-diagonal) puzzle that propagation alone cannot solve
+    hard_grid = '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......'
+    geometry = get_geometry(3, diagonal=False)
+
+    def test_strategies_keep_solution(self):
+        solved = bitboard.values2board(bitboard.solve(self.hard_grid, geometry=self.geometry), self.geometry)
+        board = bitboard.values2board(self.geometry.grid2values(self.hard_grid), self.geometry)
+        bitboard.propagate(board, None, None, self.geometry)
+        for name, strategy in bitboard.STRATEGIES.items():
+            reduced = board[:]
+            removed = strategy(reduced, self.geometry)
+            count = self.geometry.count
+            self.assertEqual(sum(map(count.__getitem__, board)) - sum(map(count.__getitem__, reduced)), removed)
+            for mask, digit in zip(reduced, solved):
+                self.assertTrue(mask & digit, "{} removed a digit of the solution".format(name))
+
+    def test_solve_with_stats(self):
+        extra = ('hidden_pairs', 'pointing_pairs', 'box_line_reduction', 'x_wing')
+        stats = SolverStats()
+        expected = bitboard.solve(self.hard_grid, geometry=self.geometry)
+        for trail in (False, True):
+            self.assertEqual(bitboard.solve(self.hard_grid, trail, self.geometry, extra, stats), expected)
+        self.assertEqual(list(stats.strategies), ['propagate'] + list(extra))
+        self.assertGreater(stats.strategies['pointing_pairs'].removed, 0)
+
+    def test_reduce_puzzle_strategies(self):
+        board = bitboard.values2board(self.geometry.grid2values(self.hard_grid), self.geometry)
+        stats = SolverStats()
+        bitboard.reduce_puzzle(board, self.geometry, ('eliminate', 'only_choice'), stats)
+        self.assertEqual(list(stats.strategies), ['eliminate', 'only_choice'])
+
+
+class TestBitboardSolve(unittest.TestCase):
+    diagonal_grid = test_solution.TestDiagonalSudoku.diagonal_grid
+    solved_diag_sudoku = test_solution.TestDiagonalSudoku.solved_diag_sudoku
+
+    def test_solve(self):
+        self.assertEqual(bitboard.solve(self.diagonal_grid), self.solved_diag_sudoku)
+
+    def test_unsolvable(self):
+        self.assertFalse(bitboard.solve('22' + '.' * 79))
+
+    def test_solve_trail(self):
+        self.assertEqual(bitboard.solve(self.diagonal_grid, trail=True), self.solved_diag_sudoku)
+        self.assertFalse(bitboard.solve('22' + '.' * 79, trail=True))
+
+    def test_undo(self):
+        board = bitboard.values2board(grid2values(self.diagonal_grid))
+        before, trail = board[:], []
+        bitboard.propagate(board, None, trail)
+        self.assertNotEqual(board, before)
+        bitboard.undo(board, trail, 0)
+        self.assertEqual(board, before)
+
+
+class TestCountSolutions(unittest.TestCase):
+    diagonal_grid = test_solution.TestDiagonalSudoku.diagonal_grid
+
+    def test_unique(self):
+        self.assertEqual(bitboard.count_solutions(self.diagonal_grid), 1)
+        self.assertEqual(bitboard.count_solutions('22' + '.' * 79), 0)
+
+    def test_limit(self):
+        geometry = get_geometry(3, diagonal=False)
+        self.assertEqual(bitboard.count_solutions('.' * 81, 5, geometry), 5)
+
+    def test_count_all(self):
+        # there are 288 distinct 4×4 Sudoku grids
+        geometry = get_geometry(2, diagonal=False)
+        self.assertEqual(bitboard.count_solutions('.' * 16, None, geometry), 288)
+        self.assertEqual(bitboard.count_solutions('.' * 16, None, geometry, processes=2), 288)
+
+
+class TestGeometry(unittest.TestCase):
+    def test_matches_solution_units(self):
+        geometry = get_geometry(3, diagonal=True)
+        self.assertEqual(geometry.unitlist, solution.unitlist)
+        self.assertEqual(dict(geometry.peers), dict(solution.peers))
+
+    def test_cached(self):
+        self.assertIs(get_geometry(4, diagonal=False), get_geometry(4, diagonal=False))
+
+    def test_solve_16x16(self):
+        for diagonal in (False, True):
+            geometry = get_geometry(4, diagonal)
+            values = bitboard.solve('.' * 256, trail=True, geometry=geometry)
+            for unit in geometry.unitlist:
+                self.assertEqual(sorted(values[box] for box in unit), sorted(geometry.digits))
+
+
+if __name__ == '__main__':
+    unittest.main()
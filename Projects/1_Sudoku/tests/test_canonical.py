@@ -0,0 +1,58 @@
+import random
+import unittest
+
+import bitboard
+import canonical
+from geometry import get_geometry
+
+
+HARD = '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......'
+DIAGONAL = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+
+def shuffle(grid, geometry, rng):
+    """Apply a random symmetry of the board and a random relabeling of the digits"""
+    n = len(geometry.digits)
+    if geometry.diagonal:
+        cells, _ = rng.choice(canonical._diagonal_transforms(geometry.size))
+    else:
+        orders = canonical._line_orders(geometry.size)
+        rows, cols = rng.choice(orders), rng.choice(orders)
+        transpose = rng.random() < 0.5
+        cells = [c * n + r if transpose else r * n + c for r in rows for c in cols]
+    digits = list(geometry.digits)
+    rng.shuffle(digits)
+    return ''.join(grid[idx] for idx in cells).translate(str.maketrans(geometry.digits, ''.join(digits)))
+
+
+class TestCanonicalForm(unittest.TestCase):
+    def test_equivalent_grids(self):
+        rng = random.Random(0)
+        for grid, geometry in ((HARD, get_geometry(3, False)), (DIAGONAL, get_geometry(3, True)),
+                               ('1...' '..2.' '....' '.3..', get_geometry(2, False)),
+                               ('1...' '..2.' '....' '.3..', get_geometry(2, True))):
+            key, transform = canonical.canonical_form(grid, geometry)
+            self.assertEqual(transform.apply(grid), key)
+            for _ in range(5):
+                self.assertEqual(canonical.canonical_form(shuffle(grid, geometry, rng), geometry)[0], key)
+
+    def test_restore(self):
+        rng = random.Random(1)
+        geometry = get_geometry(3, False)
+        grid = shuffle(HARD, geometry, rng)
+        key, transform = canonical.canonical_form(grid, geometry)
+        solution = transform.restore(geometry.values2grid(bitboard.solve(key, geometry=geometry)))
+        self.assertEqual(geometry.values2grid(bitboard.solve(grid, geometry=geometry)), solution)
+
+    def test_diagonal_units_are_kept(self):
+        # transposing keeps the diagonals of a standard board, but swapping two rows does not
+        geometry = get_geometry(3, True)
+        swapped = DIAGONAL[9:18] + DIAGONAL[:9] + DIAGONAL[18:]
+        self.assertNotEqual(canonical.canonical_form(swapped, geometry)[0],
+                            canonical.canonical_form(DIAGONAL, geometry)[0])
+        self.assertEqual(canonical.canonical_form(swapped, get_geometry(3, False))[0],
+                         canonical.canonical_form(DIAGONAL, get_geometry(3, False))[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+import dlx
+import solution
+from geometry import get_geometry
+
+from tests import test_solution
+
+
+class TestDancingLinks(unittest.TestCase):
+    diagonal_grid = test_solution.TestDiagonalSudoku.diagonal_grid
+    solved_diag_sudoku = test_solution.TestDiagonalSudoku.solved_diag_sudoku
+
+    def test_solve(self):
+        self.assertEqual(dlx.solve(self.diagonal_grid), self.solved_diag_sudoku)
+
+    def test_unsolvable(self):
+        self.assertFalse(dlx.solve('22' + '.' * 79))
+        self.assertFalse(dlx.solve('1.......1' + '.' * 72))
+
+    def test_count_4x4(self):
+        # there are 288 distinct 4×4 Sudoku grids
+        links = dlx.build_links(get_geometry(2, diagonal=False)).copy()
+        self.assertEqual(sum(1 for _ in dlx.exact_covers(links)), 288)
+
+    def test_solve_method(self):
+        for method in ('search', 'bitboard', 'trail', 'dlx'):
+            self.assertEqual(solution.solve(self.diagonal_grid, method=method), self.solved_diag_sudoku)
+        self.assertRaises(ValueError, solution.solve, self.diagonal_grid, method='guess')
+
+
+if __name__ == '__main__':
+    unittest.main()
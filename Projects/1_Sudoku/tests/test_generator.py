@@ -0,0 +1,31 @@
+import unittest
+
+import bitboard
+import generator
+from geometry import get_geometry
+
+
+class TestGenerator(unittest.TestCase):
+    def test_unique(self):
+        for diagonal in (False, True):
+            geometry = get_geometry(3, diagonal)
+            puzzle = generator.generate(1, geometry=geometry)
+            self.assertEqual(puzzle.clues, 81 - puzzle.grid.count('.'))
+            self.assertEqual(bitboard.count_solutions(puzzle.grid, geometry=geometry), 1)
+            self.assertEqual(bitboard.solve(puzzle.grid, geometry=geometry),
+                             geometry.grid2values(puzzle.solution))
+            self.assertIn(puzzle.difficulty, ('easy', 'medium', 'hard'))
+
+    def test_target_clues(self):
+        puzzle = generator.generate(2, clues=40)
+        self.assertEqual(puzzle.clues, 40)
+        self.assertEqual(bitboard.count_solutions(puzzle.grid), 1)
+
+    def test_reproducible(self):
+        geometry = get_geometry(2, diagonal=False)
+        puzzles = list(generator.generate_many(4, seed=3, geometry=geometry))
+        self.assertEqual(list(generator.generate_many(4, seed=3, geometry=geometry, processes=2)), puzzles)
+
+
+if __name__ == '__main__':
+    unittest.main()
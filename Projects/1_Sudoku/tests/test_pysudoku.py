@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from PIL import Image
+
+import PySudoku
+import solution
+from utils import AssignmentLog, grid2values, reconstruct, values2grid
+
+from tests import test_solution
+
+
+def tearDownModule():
+    # pygame's threads would deadlock the worker processes that later tests fork
+    pygame.quit()
+
+
+class TestRenderer(unittest.TestCase):
+    # a short replay keeps the test fast: the first 22 boxes of a solved board are blank
+    grid = '.' * 22 + values2grid(test_solution.TestDiagonalSudoku.solved_diag_sudoku)[22:]
+
+    def setUp(self):
+        pygame.init()
+        self.values = grid2values(self.grid)
+        self.history = AssignmentLog()
+        self.result = solution.solve(self.grid, log=self.history)
+        # the boards drawn by the replay: the initial one and one after each change
+        self.boards = [dict(self.values)]
+        for box, value in reconstruct(self.result, self.history):
+            if self.boards[-1][box] != value:
+                self.boards.append(dict(self.boards[-1], **{box: value}))
+
+    def test_frame_count(self):
+        steps = len(self.boards)
+        with tempfile.TemporaryDirectory() as tmp:
+            frames = os.path.join(tmp, 'all')
+            self.assertEqual(PySudoku.render(self.values, self.result, self.history, frames), steps)
+            self.assertEqual(len(os.listdir(frames)), steps)
+
+            # every tenth step, and the final board
+            expected = len(range(0, steps, 10)) + bool((steps - 1) % 10)
+            frames, gif = os.path.join(tmp, 'some'), os.path.join(tmp, 'replay.gif')
+            self.assertEqual(PySudoku.render(self.values, self.result, self.history, frames, gif, every=10),
+                             expected)
+            self.assertEqual(len(os.listdir(frames)), expected)
+            with Image.open(gif) as image:
+                self.assertEqual(image.n_frames, expected)
+
+    def test_assign(self):
+        renderer = PySudoku.Renderer(self.values)
+        box, value = next((box, value) for box, value in self.boards[-1].items() if self.values[box] != value)
+        self.assertIsNone(renderer.assign(box, self.values[box]))
+        self.assertIsInstance(renderer.assign(box, value), pygame.Rect)
+        self.assertIsNone(renderer.assign(box, value))
+
+    def test_incremental_drawing(self):
+        renderer = PySudoku.Renderer(self.values)
+        for before, after in zip(self.boards, self.boards[1:]):
+            for box in after:
+                if before[box] != after[box]:
+                    renderer.assign(box, after[box])
+        full = PySudoku.Renderer(self.boards[-1])
+        self.assertEqual(PySudoku._to_image(renderer.surface).tobytes(), PySudoku._to_image(full.surface).tobytes())
+
+
+if __name__ == '__main__':
+    unittest.main()
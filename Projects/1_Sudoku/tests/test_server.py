@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+import server
+from canonical import canonical_form
+
+
+GRID = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+SOLUTION = '267945381853716249491823576576438192384192657129657438642379815935281764718564923'
+
+
+class TestSolverService(unittest.TestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(2)
+        self.calls = []
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.executor.shutdown()
+
+    def solver(self, grid):
+        self.calls.append(grid)
+        self.release.wait(5)
+        return server.solve_grid(grid)
+
+    def test_coalesce_and_cache(self):
+        service = server.SolverService(self.executor, self.solver)
+
+        async def run():
+            requests = [asyncio.ensure_future(service.solve(GRID.replace('.', '0'))) for _ in range(5)]
+            await asyncio.sleep(0.01)
+            self.release.set()
+            results = await asyncio.gather(*requests)
+            results.append(await service.solve(GRID))
+            return results
+
+        self.assertEqual(asyncio.run(run()), [SOLUTION] * 6)
+        self.assertEqual(self.calls, [canonical_form(GRID)[0]])
+        self.assertEqual(service.stats(), {'hits': 1, 'misses': 1, 'coalesced': 4,
+                                           'cached': 1, 'inflight': 0})
+
+    def test_equivalent_grids(self):
+        self.release.set()
+        service = server.SolverService(self.executor, self.solver)
+        # swap the digits 1 and 2 and mirror the board left to right, which keeps both diagonals
+        table = str.maketrans('12', '21')
+        mirrored = ''.join(GRID[r * 9:r * 9 + 9][::-1] for r in range(9)).translate(table)
+        solution = ''.join(SOLUTION[r * 9:r * 9 + 9][::-1] for r in range(9)).translate(table)
+
+        async def run():
+            return await service.solve(GRID), await service.solve(mirrored)
+
+        self.assertEqual(asyncio.run(run()), (SOLUTION, solution))
+        self.assertEqual((service.hits, service.misses), (1, 1))
+
+        exact = server.SolverService(self.executor, self.solver, canonical=False)
+        asyncio.run(exact.solve(GRID))
+        self.assertEqual(self.calls[-1], GRID)
+        self.assertEqual(list(exact.cache), [GRID])
+
+    def test_lru_eviction(self):
+        self.release.set()
+        service = server.SolverService(self.executor, self.solver, cache_size=1)
+        other = '.' * 81
+
+        async def run():
+            for grid in (GRID, other, GRID):
+                await service.solve(grid)
+
+        asyncio.run(run())
+        key = canonical_form(GRID)[0]
+        self.assertEqual(self.calls, [key, other, key])
+        self.assertEqual(list(service.cache), [key])
+
+    def test_respond(self):
+        self.release.set()
+        service = server.SolverService(self.executor, self.solver)
+        unsolvable = '22' + GRID[2:]
+        self.assertEqual(asyncio.run(service.respond(GRID)), SOLUTION)
+        self.assertEqual(asyncio.run(service.respond(unsolvable)), '')
+        self.assertTrue(asyncio.run(service.respond('12345')).startswith('error:'))
+        self.assertTrue(asyncio.run(service.respond('x' + '.' * 80)).startswith('error:'))
+        self.assertRaises(ValueError, canonical_form, 'x' + '.' * 80)
+
+
+if __name__ == '__main__':
+    unittest.main()
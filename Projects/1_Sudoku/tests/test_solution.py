@@ -4,7 +4,9 @@ many additional test cases that you must also pass to complete the project. You
 own additional test cases to cover any failed tests shown in the Project Assistant feedback.
 """
 import unittest
+import run_batch
 import solution
+import utils
 
 
 class TestNakedTwins(unittest.TestCase):
@@ -99,5 +101,67 @@ class TestDiagonalSudoku(unittest.TestCase):
     def test_solve(self):
         self.assertEqual(solution.solve(self.diagonal_grid), self.solved_diag_sudoku)
 
+
+class TestAssignmentLog(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+
+    def test_reconstruct(self):
+        log = utils.AssignmentLog()
+        result = solution.solve(self.diagonal_grid, log=log)
+        values = utils.grid2values(self.diagonal_grid)
+        for box, value in utils.reconstruct(result, log):
+            values[box] = value
+        self.assertEqual(values, result)
+
+    def test_discarded_branches(self):
+        log = utils.AssignmentLog()
+        log.record('A1', '1')
+        branch = log.head
+        log.record('A2', '2')
+        log.head = branch
+        log.record('A2', '3')
+        self.assertEqual(len(log), 3)
+        self.assertEqual(log.path(), [('A1', '1'), ('A2', '3')])
+
+
+class TestSolverStats(unittest.TestCase):
+    search_grid = '.............1.2...7...5................28.6......3.9....53..463....9.5..421....9'
+
+    def test_search_stats(self):
+        from stats import SolverStats
+        stats = SolverStats()
+        self.assertEqual(solution.solve(self.search_grid, stats=stats), solution.solve(self.search_grid))
+        self.assertEqual(list(stats.strategies), ['eliminate', 'only_choice', 'naked_twins', 'propagate'])
+        passes = stats.strategies['propagate']
+        self.assertEqual(passes.removed, sum(stats.strategies[name].removed
+                                             for name in ('eliminate', 'only_choice', 'naked_twins')))
+        self.assertEqual(stats.depth, 0)
+        self.assertGreater(stats.max_depth, 0)
+        self.assertGreaterEqual(stats.branch_factor(), 2)
+
+        bitboard_stats = SolverStats()
+        solution.solve(self.search_grid, method='bitboard', stats=bitboard_stats)
+        self.assertEqual((stats.nodes, stats.backtracks, stats.max_depth),
+                         (bitboard_stats.nodes, bitboard_stats.backtracks, bitboard_stats.max_depth))
+
+
+class TestSolveMany(unittest.TestCase):
+    grids = [TestDiagonalSudoku.diagonal_grid, '22' + '.' * 79] * 3
+
+    def test_solve_many(self):
+        expected = [solution.solve(grid) for grid in self.grids]
+        self.assertEqual(list(solution.solve_many(iter(self.grids))), expected)
+
+    def test_solve_many_processes(self):
+        expected = [solution.solve(grid) for grid in self.grids]
+        self.assertEqual(list(solution.solve_many(self.grids, processes=2, chunksize=1)), expected)
+
+    def test_read_grids(self):
+        grid = TestDiagonalSudoku.diagonal_grid
+        self.assertEqual(list(run_batch.read_grids(['# comment', '', grid.replace('.', '0')])), [grid])
+        for line in (grid[:80], 'x' * 81):
+            with self.assertRaisesRegex(ValueError, '^line 2: '):
+                list(run_batch.read_grids([grid, line]))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+import bitboard
+import vectorized
+from geometry import get_geometry
+from utils import grid2values
+
+from tests import test_solution
+
+
+class TestVectorized(unittest.TestCase):
+    diagonal_grid = test_solution.TestDiagonalSudoku.diagonal_grid
+    solved_diag_sudoku = test_solution.TestDiagonalSudoku.solved_diag_sudoku
+
+    def test_propagate_matches_bitboard(self):
+        candidates = vectorized.grids2candidates([self.diagonal_grid])
+        vectorized.propagate_batch(candidates)
+        board = bitboard.values2board(grid2values(self.diagonal_grid))
+        expected = bitboard.reduce_puzzle(board, strategies=('eliminate', 'only_choice'))
+        self.assertEqual(bitboard.values2board(vectorized.candidates2values(candidates[0])), expected)
+
+    def test_solve_batch(self):
+        results = vectorized.solve_batch([self.diagonal_grid, '22' + '.' * 79, '1.......1' + '.' * 72])
+        self.assertEqual(results, [self.solved_diag_sudoku, False, False])
+
+    def test_solve_stream(self):
+        geometry = get_geometry(2, diagonal=False)
+        grids = ['1...' * 4, '12..34..........', '.' * 16]
+        results = list(vectorized.solve_stream(grids, geometry, chunksize=2))
+        self.assertEqual(results, [bitboard.solve(grid, geometry=geometry) for grid in grids])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,52 @@
 
+from array import array
 from collections import defaultdict
 
 
 rows = 'ABCDEFGHI'
 cols = '123456789'
 boxes = [r + c for r in rows for c in cols]
-history = {}  # history must be declared here so that it exists in the assign_values scope
+box_index = {box: idx for idx, box in enumerate(boxes)}
+
+
+class AssignmentLog:
+    """Append-only log of the box assignments made while solving one puzzle
+
+    Each entry stores the index of the assigned box in `boxes`, the assigned
+    digit, and the id of the previous entry on the same search branch (-1 for
+    the first assignment), so the log is a tree of branches packed into three
+    flat arrays. `head` is the id of the most recent entry on the current
+    branch; a search that backtracks resets it to the entry it branched from.
+
+    Create a new log for every puzzle and pass it to `solution.solve`.
+    """
+    def __init__(self):
+        self.box_ids = array('B')
+        self.digits = array('B')
+        self.parents = array('l')
+        self.head = -1
+
+    def __len__(self):
+        return len(self.parents)
+
+    def record(self, box, value):
+        """Append the assignment of `value` to `box` to the current branch"""
+        self.box_ids.append(box_index[box])
+        self.digits.append(int(value))
+        self.parents.append(self.head)
+        self.head = len(self.parents) - 1
+
+    def path(self, entry=None):
+        """Return the (box, value) assignments on the branch ending at `entry`
+
+        The branch ending at `head` is used if `entry` is None.
+        """
+        entry = self.head if entry is None else entry
+        path = []
+        while entry >= 0:
+            path.append((boxes[self.box_ids[entry]], str(self.digits[entry])))
+            entry = self.parents[entry]
+        return path[::-1]
 
 
 def extract_units(unitlist, boxes):
@@ -25,14 +66,13 @@ def extract_units(unitlist, boxes):
         a dictionary with a key for each box (string) whose value is a list
         containing the units that the box belongs to (i.e., the "member units")
     """
+    # a single pass over the units, instead of scanning every unit for every box
+    found = {}
+    for unit in unitlist:
+        for box in unit:
+            found.setdefault(box, []).append(unit)
     # the value for keys that aren't in the dictionary are initialized as an empty list
-    units = defaultdict(list)
-    for current_box in boxes:
-        for unit in unitlist:
-            if current_box in unit:
-                # defaultdict avoids this raising a KeyError when new keys are added
-                units[current_box].append(unit)
-    return units
+    return defaultdict(list, ((box, found[box]) for box in boxes if box in found))
 
 
 def extract_peers(units, boxes):
@@ -58,15 +98,16 @@ def extract_peers(units, boxes):
     # the value for keys that aren't in the dictionary are initialized as an empty list
     peers = defaultdict(set)  # set avoids duplicates
     for key_box in boxes:
+        box_peers = set()
         for unit in units[key_box]:
-            for peer_box in unit:
-                if peer_box != key_box:
-                    # defaultdict avoids this raising a KeyError when new keys are added
-                    peers[key_box].add(peer_box)
+            box_peers.update(unit)
+        box_peers.discard(key_box)
+        if box_peers:
+            peers[key_box] = box_peers
     return peers
 
 
-def assign_value(values, box, value):
+def assign_value(values, box, value, log=None):
     """You must use this function to update your values dictionary if you want to
     try using the provided visualization tool. This function records each assignment
     (in order) for later reconstruction.
@@ -76,19 +117,27 @@ def assign_value(values, box, value):
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    box(string)
+        the name of the box to update, e.g., 'A1'
+
+    value(string)
+        the new candidate digits for the box
+
+    log(AssignmentLog)
+        the log for the current solve; nothing is recorded if this is None
+
     Returns
     -------
     dict
-        The values dictionary with the naked twins eliminated from peers
+        The values dictionary with the new value assigned to the box
     """
     # Don't waste memory appending actions that don't actually change any values
     if values[box] == value:
         return values
 
-    prev = values2grid(values)
     values[box] = value
-    if len(value) == 1:
-        history[values2grid(values)] = (prev, (box, value))
+    if log is not None and len(value) == 1:
+        log.record(box, value)
     return values
 
 def cross(A, B):
@@ -160,18 +209,18 @@ def display(values):
     print()
 
 
-def reconstruct(values, history):
+def reconstruct(values, log):
     """Returns the solution as a sequence of value assignments 
 
     Parameters
     ----------
     values(dict)
-        a dictionary of the form {'box_name': '123456789', ...}
+        a dictionary of the form {'box_name': '123456789', ...} holding the
+        solution that was found while recording the log
 
-    history(dict)
-        a dictionary of the form {key: (key, (box, value))} encoding a linked
-        list where each element points to the parent and identifies the value
-        assignment that connects from the parent to the current state
+    log(AssignmentLog)
+        the assignment log recorded while solving the puzzle; its head is the
+        last assignment on the branch that reached the solution
 
     Returns
     -------
@@ -179,9 +228,4 @@ def reconstruct(values, history):
         a list of (box, value) assignments that can be applied in order to the
         starting Sudoku puzzle to reach the solution
     """
-    path = []
-    prev = values2grid(values)
-    while prev in history:
-        prev, step = history[prev]
-        path.append(step)
-    return path[::-1]
+    return log.path()
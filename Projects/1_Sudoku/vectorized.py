@@ -0,0 +1,251 @@
+"""NumPy batch propagation for solving many Sudoku puzzles at once
+
+A batch of N puzzles is stored as an (N, boxes, digits) boolean tensor of
+candidates. `eliminate` and `only_choice` work on the whole batch at once
+using index matrices built from the units of a `geometry.Geometry`, so each
+propagation pass is a handful of NumPy operations instead of a Python loop
+per puzzle. Propagation stops for each board when it is solved,
+contradicted or no longer changes; only the boards that still have open
+boxes are handed to the scalar `bitboard.search`.
+
+Memory use grows with the batch size (each pass gathers an
+(N, units, digits, digits) array), so large inputs should be solved in
+chunks with `solve_stream`.
+"""
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+
+import bitboard
+from geometry import get_geometry
+
+
+DIAGONAL = get_geometry(3, diagonal=True)
+
+SOLVED, STUCK, INVALID = 0, 1, 2
+
+
+class BatchTables:
+    """Index matrices for vectorized propagation on one geometry
+
+    Attributes
+    ----------
+    units : numpy.ndarray
+        A (units, digits) matrix of the box indices in each unit
+
+    box_units : numpy.ndarray
+        A (boxes, max units) matrix of the units that contain each box; rows of
+        boxes in fewer units (e.g., off the diagonals) are padded with the
+        index of an extra unit that never holds a digit
+
+    bits : numpy.ndarray
+        The mask of each digit, to convert candidates to `bitboard` masks
+    """
+    def __init__(self, geometry):
+        nunits = len(geometry.unit_indices)
+        width = max(len(units) for units in geometry.box_units)
+        self.units = np.array(geometry.unit_indices, dtype=np.intp)
+        self.box_units = np.array([units + (nunits,) * (width - len(units))
+                                   for units in geometry.box_units], dtype=np.intp)
+        self.bits = 1 << np.arange(len(geometry.digits), dtype=np.int64)
+
+
+@lru_cache()
+def get_tables(geometry=DIAGONAL):
+    """Return the shared `BatchTables` for a geometry"""
+    return BatchTables(geometry)
+
+
+def _per_box(unit_digits, tables):
+    """Combine an (N, units, digits) array into (N, boxes, digits) with any() over the units of each box"""
+    shape = list(unit_digits.shape)
+    shape[1] = 1
+    padded = np.concatenate([unit_digits, np.zeros(shape, dtype=bool)], axis=1)
+    return padded[:, tables.box_units].any(axis=2)
+
+
+def grids2candidates(grids, geometry=DIAGONAL):
+    """Convert a list of grid strings into an (N, boxes, digits) candidate tensor
+
+    Parameters
+    ----------
+    grids(list)
+        strings representing sudoku grids; '.' or '0' marks an empty box
+
+    geometry(Geometry)
+        the geometry of the puzzles
+
+    Returns
+    -------
+    numpy.ndarray
+        A boolean tensor that is True where a digit is a candidate for a box
+    """
+    nboxes, ndigits = len(geometry.boxes), len(geometry.digits)
+    for grid in grids:
+        if len(grid) != nboxes:
+            raise ValueError("Expected a grid of {} characters, got {}".format(nboxes, len(grid)))
+    lookup = np.full(256, -1, dtype=np.intp)
+    for idx, digit in enumerate(geometry.digits):
+        lookup[ord(digit)] = idx
+    chars = np.frombuffer(''.join(grids).encode('ascii'), dtype=np.uint8)
+    clues = lookup[chars].reshape(len(grids), nboxes)
+    return (clues[..., None] == np.arange(ndigits)) | (clues[..., None] < 0)
+
+
+def eliminate(candidates, geometry=DIAGONAL):
+    """Remove the digit of every solved box from the candidates of its peers, for every board
+
+    Parameters
+    ----------
+    candidates(numpy.ndarray)
+        an (N, boxes, digits) candidate tensor; it is modified in place
+
+    geometry(Geometry)
+        the geometry of the boards
+
+    Returns
+    -------
+    numpy.ndarray
+        A boolean array that is True for the boards with a digit solved twice
+        in one unit
+    """
+    tables = get_tables(geometry)
+    solved = candidates & (candidates.sum(axis=2, dtype=np.uint8) == 1)[..., None]
+    in_unit = solved[:, tables.units]
+    invalid = (in_unit.sum(axis=2, dtype=np.uint8) > 1).any(axis=(1, 2))
+    candidates &= ~_per_box(in_unit.any(axis=2), tables) | solved
+    return invalid
+
+
+def only_choice(candidates, geometry=DIAGONAL):
+    """Assign every digit that fits in only one box of a unit to that box, for every board
+
+    Parameters
+    ----------
+    candidates(numpy.ndarray)
+        an (N, boxes, digits) candidate tensor; it is modified in place
+
+    geometry(Geometry)
+        the geometry of the boards
+
+    Returns
+    -------
+    numpy.ndarray
+        A boolean array that is True for the boards with a contradiction: a
+        digit with no place left in a unit, or a box that is the only place
+        of two digits
+    """
+    tables = get_tables(geometry)
+    counts = candidates[:, tables.units].sum(axis=2, dtype=np.uint8)
+    invalid = (counts == 0).any(axis=(1, 2))
+    hidden = _per_box(counts == 1, tables) & candidates
+    invalid |= (hidden.sum(axis=2, dtype=np.uint8) > 1).any(axis=1)
+    found = hidden.any(axis=2)
+    candidates[found] = hidden[found]
+    return invalid
+
+
+def propagate_batch(candidates, geometry=DIAGONAL):
+    """Apply eliminate and only choice to every board until each one stops changing
+
+    Boards that are solved or contradicted are dropped from the batch as soon
+    as they are found, so later passes only work on the boards that are
+    still changing.
+
+    Parameters
+    ----------
+    candidates(numpy.ndarray)
+        an (N, boxes, digits) candidate tensor; it is modified in place
+
+    geometry(Geometry)
+        the geometry of the boards
+
+    Returns
+    -------
+    numpy.ndarray
+        The status of each board: `SOLVED`, `STUCK` (needs search) or `INVALID`
+    """
+    status = np.full(len(candidates), STUCK, dtype=np.int8)
+    active = np.arange(len(candidates))
+    while active.size:
+        boards = candidates[active]
+        before = boards.copy()
+        invalid = eliminate(boards, geometry)
+        invalid |= only_choice(boards, geometry)
+        candidates[active] = boards
+
+        counts = boards.sum(axis=2, dtype=np.uint8)
+        invalid |= (counts == 0).any(axis=1)
+        changed = (boards != before).any(axis=(1, 2))
+        solved = (counts == 1).all(axis=1) & ~changed & ~invalid
+        status[active[invalid]] = INVALID
+        status[active[solved]] = SOLVED
+        active = active[changed & ~invalid]
+    return status
+
+
+def candidates2values(candidates, geometry=DIAGONAL):
+    """Convert the candidates of one board into a dictionary of {box: digits}"""
+    digits = geometry.digits
+    return {box: ''.join(digits[d] for d in np.flatnonzero(row))
+            for box, row in zip(geometry.boxes, candidates)}
+
+
+def solve_batch(grids, geometry=DIAGONAL):
+    """Solve a list of Sudoku puzzles with batch propagation and scalar search
+
+    Parameters
+    ----------
+    grids(list)
+        strings representing sudoku grids
+
+    geometry(Geometry)
+        the geometry of the puzzles
+
+    Returns
+    -------
+    list
+        The dictionary representation of each solved grid, or False for the
+        puzzles without a solution, in the order of `grids`
+    """
+    if not grids:
+        return []
+    candidates = grids2candidates(grids, geometry)
+    status = propagate_batch(candidates, geometry)
+    masks = candidates.dot(get_tables(geometry).bits)
+    results = []
+    for board, state in zip(masks.tolist(), status):
+        if state == STUCK:
+            board = bitboard.search(board, None, geometry)
+        elif state == INVALID:
+            board = False
+        results.append(bitboard.board2values(board, geometry) if board else False)
+    return results
+
+
+def solve_stream(grids, geometry=DIAGONAL, chunksize=1024):
+    """Solve a stream of Sudoku puzzles in batches, yielding each result in input order
+
+    Parameters
+    ----------
+    grids(iterable)
+        an iterable of strings representing sudoku grids
+
+    geometry(Geometry)
+        the geometry of the puzzles
+
+    chunksize(int)
+        the number of puzzles propagated together
+
+    Yields
+    ------
+    dict or False
+        The solution of each grid, as returned by `solve_batch`
+    """
+    grids = iter(grids)
+    while True:
+        chunk = list(islice(grids, chunksize))
+        if not chunk:
+            break
+        yield from solve_batch(chunk, geometry)
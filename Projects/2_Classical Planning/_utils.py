@@ -1,4 +1,5 @@
 
+from collections import OrderedDict
 from itertools import product
 from timeit import default_timer as timer
 
@@ -12,8 +13,65 @@ class PrintableProblem(InstrumentedProblem):
     modifies the print output of those statistics for air cargo problems.
     """
     def __repr__(self):
-        return '{:^10d}  {:^10d}  {:^10d}  {:^10d}'.format(
-            len(self.problem.actions_list), self.succs, self.goal_tests, self.states)
+        cache = self.problem.heuristic_cache
+        return '{:^10d}  {:^10d}  {:^10d}  {:^10d}  {:^10d}  {:^10d}'.format(
+            len(self.problem.actions_list), self.succs, self.goal_tests, self.states,
+            cache.hits, cache.misses)
+
+
+class HeuristicCache:
+    """ A bounded cache of heuristic values keyed by (heuristic name, state)
+
+    Attributes
+    ----------
+    maxsize : int or None
+        The largest number of values kept; None keeps every value and 0
+        disables caching
+
+    policy : str
+        'lru' evicts the least recently used value when the cache is full,
+        and 'fifo' evicts the oldest value
+
+    hits, misses, evictions : int
+        Counts of the lookups that found a cached value, the lookups that
+        computed a new one, and the values removed to make room
+    """
+    POLICIES = ('lru', 'fifo')
+
+    def __init__(self, maxsize=None, policy='lru'):
+        if policy not in self.POLICIES:
+            raise ValueError("Unknown eviction policy {!r}; choose from {}".format(policy, self.POLICIES))
+        if maxsize is not None and maxsize < 0:
+            raise ValueError("The cache size must be None or a non-negative integer")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.values = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def get(self, key, compute):
+        """ Return the cached value of a key, or call compute() and cache its result """
+        values = self.values
+        if key in values:
+            self.hits += 1
+            if self.policy == 'lru':
+                values.move_to_end(key)
+            return values[key]
+        self.misses += 1
+        value = compute()
+        if self.maxsize != 0:
+            values[key] = value
+            if self.maxsize is not None and len(values) > self.maxsize:
+                values.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        """ Remove every cached value and reset the counters """
+        self.values.clear()
+        self.hits = self.misses = self.evictions = 0
 
 
 def run_search(problem, search_function, parameter=None):
@@ -24,7 +82,7 @@ def run_search(problem, search_function, parameter=None):
     else:
         node = search_function(ip)
     end = timer()
-    print("\n# Actions   Expansions   Goal Tests   New Nodes")
+    print("\n# Actions   Expansions   Goal Tests   New Nodes   Cache Hits  Cache Misses")
     print("{}\n".format(ip))
     show_solution(node, end - start)
     print()
@@ -81,6 +139,31 @@ class FluentState:
         return expr(conjunctive_sentence(self.pos, []))
 
 
+class FrozenFluentState(FluentState):
+    """ Represent a planning problem state as immutable sets of positive and
+    negative fluents
+
+    decode_state returns instances of this class. Testing whether a fluent is
+    in pos or neg takes constant time, and states can be hashed, so decoded
+    states can be cached or used as dict keys.
+    """
+    def __init__(self, pos_list, neg_list):
+        self.pos = frozenset(pos_list)
+        self.neg = frozenset(neg_list)
+
+    def __eq__(self, other):
+        return isinstance(other, FrozenFluentState) and self.pos == other.pos and self.neg == other.neg
+
+    def __hash__(self):
+        return hash((self.pos, self.neg))
+
+    def sentence(self):
+        return expr(conjunctive_sentence(sorted(self.pos, key=str), sorted(self.neg, key=str)))
+
+    def pos_sentence(self):
+        return expr(conjunctive_sentence(sorted(self.pos, key=str), []))
+
+
 def conjunctive_sentence(pos_list, neg_list):
     """ Express a state as a conjunctive sentence from positive and negative fluent lists
 
@@ -127,12 +210,13 @@ def encode_state(fs, fluent_map):
     -------
     tuple of True/False elements corresponding to the fluents in fluent_map
     """
-    return tuple([f in fs.pos for f in fluent_map])
+    pos = set(fs.pos)
+    return tuple([f in pos for f in fluent_map])
 
 
 def decode_state(state, fluent_map):
     """ Convert an ordered list of True/False values into a FluentState
-    (list of positive fluents and negative fluents)
+    (set of positive fluents and negative fluents)
 
     It is sometimes convenient to encode a problem in terms of the specific
     fluents that are True or False in a state, but other times it is easier (or faster)
@@ -141,21 +225,88 @@ def decode_state(state, fluent_map):
     Parameters
     ----------
     state:
-        A state represented as an ordered sequence of True/False values
+        A state represented as an ordered sequence of True/False values, or as
+        an integer bitset (see encode_bitset)
+
+    fluent_map:
+        An ordered sequence of fluents
+
+    Returns
+    -------
+    FrozenFluentState instance containing the fluents from fluent_map corresponding to True
+    entries from the input state in the pos set, and containing the fluents from
+    fluent_map corresponding to False entries in the neg set
+    """
+    if isinstance(state, int):
+        state = bitset_to_tuple(state, fluent_map)
+    pos, neg = [], []
+    for elem, fluent in zip(state, fluent_map):
+        (pos if elem else neg).append(fluent)
+    return FrozenFluentState(pos, neg)
+
+
+def encode_bitset(fs, fluent_map):
+    """ Convert a FluentState into an integer with one bit per fluent
+
+    With n fluents, bit n - 1 - i of the result is set when fluent_map[i] is
+    True in the state, so applying an action or testing a set of fluents
+    takes a few integer operations instead of a pass over every fluent. The
+    first fluent is the most significant bit, which makes bitset states
+    compare like the tuples of encode_state; searches that break ties by
+    comparing states expand the same nodes with either encoding.
+
+    Parameters
+    ----------
+    fs: FluentState
+        A state object represented as a FluentState
+
+    fluent_map:
+        An ordered sequence of fluents, or a dict mapping each fluent to its index
+
+    Returns
+    -------
+    int with the bits of the fluents in fs.pos set
+    """
+    return fluent_mask(fs.pos, fluent_map)
+
+
+def bitset_to_tuple(state, fluent_map):
+    """ Convert a state encoded by encode_bitset into the sequence of
+    True/False values that encode_state returns for the same state
+
+    Parameters
+    ----------
+    state: int
+        A state represented as an integer bitset
 
     fluent_map:
         An ordered sequence of fluents
 
     Returns
     -------
-    FluentState instance containing the fluents from fluent_map corresponding to True
-    entries from the input state in the pos_list, and containing the fluents from
-    fluent_map corresponding to False entries in the neg_list
+    tuple of True/False elements corresponding to the fluents in fluent_map
+    """
+    return tuple([bool(state >> idx & 1) for idx in reversed(range(len(fluent_map)))])
+
+
+def fluent_mask(fluents, fluent_map):
+    """ Return an integer with the bits of the given fluents set
+
+    Fluents that are not in fluent_map are ignored. Bits are laid out as in
+    encode_bitset.
+
+    Parameters
+    ----------
+    fluents:
+        An iterable collection of fluents
+
+    fluent_map:
+        An ordered sequence of fluents, or a dict mapping each fluent to its index
     """
-    fs = FluentState(set(), set())
-    for idx, elem in enumerate(state):
-        if elem:
-            fs.pos.append(fluent_map[idx])
-        else:
-            fs.neg.append(fluent_map[idx])
-    return fs
+    index = fluent_map if isinstance(fluent_map, dict) else {f: i for i, f in enumerate(fluent_map)}
+    last = len(index) - 1
+    mask = 0
+    for f in fluents:
+        if f in index:
+            mask |= 1 << (last - index[f])
+    return mask
@@ -17,7 +17,7 @@ from planning_problem import BasePlanningProblem
 
 
 class HaveCakeProblem(BasePlanningProblem):
-    def __init__(self, initial, goal):
+    def __init__(self, initial, goal, bitset=False):
         """
         Parameters
         ----------
@@ -30,8 +30,12 @@ class HaveCakeProblem(BasePlanningProblem):
             A collection of literal fluents describing the goal state of
             the problem (each fluent should be an instance of the
             `aimacode.utils.Expr` class)
+
+        bitset : bool
+            Flag indicating whether states are encoded as integer bitsets
+            (see BasePlanningProblem)
         """
-        super().__init__(initial, goal)
+        super().__init__(initial, goal, bitset)
         self.actions_list = self.get_actions()
 
     def get_actions(self):
@@ -52,7 +56,7 @@ class HaveCakeProblem(BasePlanningProblem):
         return [eat_action, bake_action]
 
 
-def have_cake():
+def have_cake(bitset=False):
     cakes = ['Cake']
     have_relations = make_relations('Have', cakes)
     eaten_relations = make_relations('Eaten', cakes)
@@ -65,7 +69,7 @@ def have_cake():
     def get_goal():
         return have_relations + eaten_relations
 
-    return HaveCakeProblem(get_init(), get_goal())
+    return HaveCakeProblem(get_init(), get_goal(), bitset)
 
 
 if __name__ == '__main__':
@@ -2,7 +2,8 @@
 from copy import deepcopy
 from functools import lru_cache
 from itertools import combinations
-from collections import defaultdict, MutableSet
+from collections import defaultdict
+from collections.abc import Mapping, MutableSet
 
 from aimacode.planning import Action
 from aimacode.utils import expr, Expr
@@ -79,6 +80,128 @@ class ActionNode(object):
             and self.expr == other.expr)
 
 
+def bit_positions(bits):
+    """ Return the positions of the set bits of an integer, from the lowest """
+    positions = []
+    while bits:
+        low = bits & -bits
+        positions.append(low.bit_length() - 1)
+        bits ^= low
+    return positions
+
+
+class NodeIndex(object):
+    """ Numbering of the actions or the literals of a planning graph
+
+    Layers that share an index store sets of nodes and mutex relations as
+    integer bitsets, where bit i stands for items[i]. Relations between two
+    layers become bitwise operations between rows, e.g., the actions that
+    need a literal are children[position[literal]] of the literal index.
+
+    Attributes
+    ----------
+    items : list
+        The numbered nodes
+
+    position : dict
+        Mapping from each node to its number
+
+    static : list
+        For each node, the bits of the nodes it is always mutex with (e.g.,
+        by negation, inconsistent effects or interference)
+
+    parents, children : list
+        For each node, the bits of the nodes of the other index it is linked
+        to in the previous and the next layer (see `link`)
+
+    parent_positions : list
+        For each node, the numbers of its parents in the other index
+    """
+    def __init__(self, items, static_mutexes):
+        """
+        Parameters
+        ----------
+        items : iterable
+            The nodes to number
+
+        static_mutexes : dict
+            Mapping from a node to the nodes it is always mutex with
+        """
+        self.items = list(items)
+        self.position = {item: i for i, item in enumerate(self.items)}
+        self.static = [self.mask(static_mutexes.get(item, ())) for item in self.items]
+        self.parents = self.children = self.parent_positions = None
+
+    def mask(self, items):
+        """ Return the bits of a collection of numbered nodes """
+        position = self.position
+        bits = 0
+        for item in items:
+            bits |= 1 << position[item]
+        return bits
+
+    def link(self, other, parents, children):
+        """ Record the nodes of another index that each node is connected to
+
+        Parameters
+        ----------
+        other : NodeIndex
+            The index of the nodes in the neighbouring layers
+
+        parents, children : callable
+            Functions mapping a node to its parent and child nodes in `other`
+        """
+        self.parents = [other.mask(parents(item)) for item in self.items]
+        self.children = [other.mask(children(item)) for item in self.items]
+        self.parent_positions = [bit_positions(bits) for bits in self.parents]
+
+
+class EdgeStore(object):
+    """ The edges from the nodes of one kind of layer (actions or literals) to
+    their parents or children, shared by all the layers of that kind in a
+    planning graph
+
+    Layers are added to a planning graph monotonically, so every layer has
+    the edges of the layer before it. Instead of copying them, each edge is
+    stored once along with the level of the layer it was added to, and a
+    layer only sees the edges of its own level and the levels before it
+    (see EdgeView).
+
+    Attributes
+    ----------
+    edges : dict
+        Mapping from each node to a list of (level, node) pairs
+    """
+    def __init__(self):
+        self.edges = defaultdict(list)
+
+    def add(self, node, others, level):
+        """ Add edges from a node to each of the `others` at a level """
+        self.edges[node].extend((level, other) for other in others)
+
+
+class EdgeView(Mapping):
+    """ The edges of an EdgeStore up to a level, as a mapping from each node to
+    the set of nodes it is connected to. Missing nodes map to an empty set. """
+    def __init__(self, store, level):
+        self._store = store
+        self._level = level
+
+    def __getitem__(self, node):
+        level = self._level
+        return set(other for at, other in self._store.edges.get(node, ()) if at <= level)
+
+    def __contains__(self, node):
+        level = self._level
+        return any(at <= level for at, _ in self._store.edges.get(node, ()))
+
+    def __iter__(self):
+        return (node for node in list(self._store.edges) if node in self)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
 class BaseLayer(MutableSet):
     """ Base class for ActionLayer and LiteralLayer classes for planning graphs
     that stores actions or literals as a mutable set (which enables terse,
@@ -86,18 +209,23 @@ class BaseLayer(MutableSet):
 
     Attributes
     ----------
-    parents : dict
+    parents : EdgeView
         Mapping from each item (action or literal) in the current layer to the
         symbolic node(s) in parent layer of the planning graph. E.g.,
         parents[actionA] is a set containing the symbolic literals (positive AND
         negative) that are preconditions of the action.
 
-    children : dict
+    children : EdgeView
         Mapping from each item (action or literal) in the current layer to the
         symbolic node(s) in the child layer of the planning graph. E.g.,
         children[actionA] is a set containing the symbolic literals (positive AND
         negative) that are set by performing actionA.
 
+    _level : int
+        The number of layers of the same kind before this one in the planning
+        graph; a layer built from another layer of the same kind shares its
+        EdgeStores and is one level higher
+
     parent_layer : BaseLayer (or subclass)
         Contains a reference to the layer preceding this one in the planning graph;
         the root literal layer of a planning graph contains an empty ActionLayer as
@@ -114,8 +242,21 @@ class BaseLayer(MutableSet):
         If _ignore_mutexes is True then _dynamic_ mutexes will be ignored (static
         mutexes are *always* enforced). For example, a literal X is always mutex
         with ~X, but "competing needs" or "inconsistent support" can be skipped
+
+    _index : NodeIndex or None
+        The numbering of the items this layer can hold. When it is given, the
+        mutexes are stored in _mutex_rows as one bitset per item, and
+        update_mutexes computes them with bitwise operations on the rows of
+        the parent layer instead of testing every pair of items
+
+    _mutex_rows : dict
+        Mapping from the number of each item with a mutex to the bits of the
+        items it is mutex with (only used with an _index)
+
+    _item_bits : int
+        The bits of the items in this layer (only used with an _index)
     """
-    def __init__(self, items=[], parent_layer=None, ignore_mutexes=False):
+    def __init__(self, items=[], parent_layer=None, ignore_mutexes=False, index=None):
         """
         Parameters
         ----------
@@ -127,14 +268,34 @@ class BaseLayer(MutableSet):
 
         ignore_mutexes : bool
             See _ignore_mutexes attribute
+
+        index : NodeIndex
+            See _index attribute; if None, a layer built from another layer of
+            the same kind shares its index
         """
         super().__init__()
         self.__store = set(iter(items))
-        self.parents = defaultdict(set)
-        self.children = defaultdict(set)
-        self._mutexes = defaultdict(set)
+        if isinstance(items, BaseLayer):
+            self._level = items._level + 1
+            self._parent_edges, self._child_edges = items._parent_edges, items._child_edges
+        else:
+            self._level = 0
+            self._parent_edges, self._child_edges = EdgeStore(), EdgeStore()
+        self.parents = EdgeView(self._parent_edges, self._level)
+        self.children = EdgeView(self._child_edges, self._level)
+        self.__mutexes = defaultdict(set)
         self.parent_layer = parent_layer
         self._ignore_mutexes = ignore_mutexes
+        if index is None and isinstance(items, BaseLayer):
+            index = items._index
+        self._index = index
+        self._mutex_rows = {}
+        if index is None:
+            self._item_bits = None
+        elif isinstance(items, BaseLayer) and items._index is index:
+            self._item_bits = items._item_bits
+        else:
+            self._item_bits = index.mask(self.__store)
 
     def __contains__(self, item):
         return item in self.__store
@@ -146,36 +307,63 @@ class BaseLayer(MutableSet):
         return len(self.__store)
 
     def __eq__(self, other):
+        if self._index is not None and self._index is getattr(other, '_index', None):
+            return self._item_bits == other._item_bits and self._mutex_rows == other._mutex_rows
         return (len(self) == len(other) and
             len(self._mutexes) == len(other._mutexes) and
             0 == len(self ^ other) and self._mutexes == other._mutexes)
 
+    @property
+    def _mutexes(self):
+        if self._index is None:
+            return self.__mutexes
+        items = self._index.items
+        return {items[i]: set(items[j] for j in bit_positions(row)) for i, row in self._mutex_rows.items()}
+
     def add(self, item):
         self.__store.add(item)
+        if self._index is not None:
+            self._item_bits |= 1 << self._index.position[item]
 
     def discard(self, item):
         try:
             self.__store.discard(item)
         except ValueError:
             pass
+        if self._index is not None and item in self._index.position:
+            self._item_bits &= ~(1 << self._index.position[item])
 
     def set_mutex(self, itemA, itemB):
-        self._mutexes[itemA].add(itemB)
-        self._mutexes[itemB].add(itemA)
+        if self._index is not None:
+            position, rows = self._index.position, self._mutex_rows
+            a, b = position[itemA], position[itemB]
+            rows[a] = rows.get(a, 0) | 1 << b
+            rows[b] = rows.get(b, 0) | 1 << a
+            return
+        self.__mutexes[itemA].add(itemB)
+        self.__mutexes[itemB].add(itemA)
 
     def is_mutex(self, itemA, itemB):
-        return itemA in self._mutexes.get(itemB, [])
+        if self._index is not None:
+            position = self._index.position
+            if itemA not in position or itemB not in position:
+                return False
+            return bool(self._mutex_rows.get(position[itemB], 0) >> position[itemA] & 1)
+        return itemA in self.__mutexes.get(itemB, [])
+
+    def _bits(self):
+        """ Return the bits of the items in this layer """
+        return self._item_bits
 
 
 class BaseActionLayer(BaseLayer):
-    def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False):
-        super().__init__(actions, parent_layer, ignore_mutexes)
+    def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False, index=None):
+        super().__init__(actions, parent_layer, ignore_mutexes, index)
         self._serialize=serialize
-        if isinstance(actions, BaseActionLayer):
-            self.parents.update({k: set(v) for k, v in actions.parents.items()})
-            self.children.update({k: set(v) for k, v in actions.children.items()})
 
     def update_mutexes(self):
+        if self._index is not None:
+            return self._update_mutex_rows()
         for actionA, actionB in combinations(iter(self), 2):
             if self._serialize and actionA.no_op == actionB.no_op == False:
                 self.set_mutex(actionA, actionB)
@@ -187,23 +375,53 @@ class BaseActionLayer(BaseLayer):
             elif self._competing_needs(actionA, actionB):
                 self.set_mutex(actionA, actionB)
 
+    def _update_mutex_rows(self):
+        """ Compute the mutexes of every action at once from the mutex rows of the parent layer """
+        index = self._index
+        position, static, preconditions = index.position, index.static, index.parent_positions
+        layer = self._bits()
+        serial = index.mask(a for a in self if not a.no_op) if self._serialize else 0
+
+        # competing needs: for each literal of the parent layer, the actions that need a literal
+        # mutex with it; an action is mutex with the actions in the rows of its preconditions
+        needs = {}
+        if not self._ignore_mutexes:
+            consumers = self.parent_layer._index.children
+            for literal, row in self.parent_layer._mutex_rows.items():
+                bits = 0
+                for other in bit_positions(row):
+                    bits |= consumers[other]
+                needs[literal] = bits
+
+        rows = {}
+        for action in self:
+            i = position[action]
+            row = static[i]
+            if serial >> i & 1:
+                row |= serial
+            for literal in preconditions[i]:
+                row |= needs.get(literal, 0)
+            row &= layer & ~(1 << i)
+            if row:
+                rows[i] = row
+        self._mutex_rows = rows
+
     def add_inbound_edges(self, action, literals):
         # inbound action edges are many-to-one
-        self.parents[action] |= set(literals)
+        self._parent_edges.add(action, literals, self._level)
 
     def add_outbound_edges(self, action, literals):
         # outbound action edges are one-to-many
-        self.children[action] |= set(literals)
+        self._child_edges.add(action, literals, self._level)
 
 
 class BaseLiteralLayer(BaseLayer):
-    def __init__(self, literals=[], parent_layer=None, ignore_mutexes=False):
-        super().__init__(literals, parent_layer, ignore_mutexes)
-        if isinstance(literals, BaseLiteralLayer):
-            self.parents.update({k: set(v) for k, v in literals.parents.items()})
-            self.children.update({k: set(v) for k, v in literals.children.items()})
+    def __init__(self, literals=[], parent_layer=None, ignore_mutexes=False, index=None):
+        super().__init__(literals, parent_layer, ignore_mutexes, index)
 
     def update_mutexes(self):
+        if self._index is not None:
+            return self._update_mutex_rows()
         for literalA, literalB in combinations(iter(self), 2):
             if self._negation(literalA, literalB):
                 self.set_mutex(literalA, literalB)
@@ -212,12 +430,46 @@ class BaseLiteralLayer(BaseLayer):
             elif len(self.parent_layer) and self._inconsistent_support(literalA, literalB):
                 self.set_mutex(literalA, literalB)
 
+    def _update_mutex_rows(self):
+        """ Compute the mutexes of every literal at once from the mutex rows of the parent layer """
+        index = self._index
+        position, static = index.position, index.static
+        layer = self._bits()
+        numbers = [position[literal] for literal in self]
+        rows = {}
+        for i in numbers:
+            row = static[i] & layer
+            if row:
+                rows[i] = row
+
+        if not self._ignore_mutexes and len(self.parent_layer):
+            # inconsistent support: two literals are mutex unless an action that supports one
+            # of them is not mutex with an action that supports the other
+            actions = self.parent_layer._bits()
+            action_rows = self.parent_layer._mutex_rows
+            supporters, compatible = [], []
+            for i in numbers:
+                support = index.parents[i] & actions
+                bits = 0
+                for action in bit_positions(support):
+                    bits |= actions & ~action_rows.get(action, 0)
+                supporters.append(support)
+                compatible.append(bits)
+            for a in range(len(numbers)):
+                bits = compatible[a]
+                for b in range(a + 1, len(numbers)):
+                    if not bits & supporters[b]:
+                        i, j = numbers[a], numbers[b]
+                        rows[i] = rows.get(i, 0) | 1 << j
+                        rows[j] = rows.get(j, 0) | 1 << i
+        self._mutex_rows = rows
+
     def add_inbound_edges(self, action, literals):
         # inbound literal edges are many-to-many
         for literal in literals:
-            self.parents[literal].add(action)
+            self._parent_edges.add(literal, (action,), self._level)
 
     def add_outbound_edges(self, action, literals):
         # outbound literal edges are many-to-many
         for literal in literals:
-            self.children[literal].add(action)
+            self._child_edges.add(literal, (action,), self._level)
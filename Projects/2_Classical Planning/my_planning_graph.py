@@ -1,9 +1,11 @@
 
+from collections import defaultdict
 from itertools import chain, combinations
 from aimacode.planning import Action
 from aimacode.utils import expr
 
-from layers import BaseActionLayer, BaseLiteralLayer, makeNoOp, make_node
+from _utils import bitset_to_tuple
+from layers import BaseActionLayer, BaseLiteralLayer, NodeIndex, makeNoOp, make_node
 
 
 class ActionLayer(BaseActionLayer):
@@ -73,40 +75,128 @@ class LiteralLayer(BaseLiteralLayer):
         return literalA==(~literalB)
 
 
+class PlanningGraphSkeleton:
+    """ The parts of a planning graph that do not depend on the state it starts from
+
+    A skeleton is built once per problem and shared by every PlanningGraph
+    built for that problem, so computing a planning graph heuristic for a
+    new state only works out which nodes are in each layer and the mutexes
+    that depend on the state (competing needs and inconsistent support).
+
+    Attributes
+    ----------
+    action_nodes : list
+        The no-op actions for every literal, followed by the nodes of
+        problem.actions_list
+
+    literals : list
+        The pair (fluent, ~fluent) for every fluent in problem.state_map
+
+    consumers : dict
+        Mapping from each literal to the action nodes that have it as a
+        precondition
+
+    free_actions : list
+        The action nodes without preconditions
+
+    action_mutexes : dict
+        Mapping from each action node to the action nodes it is mutex with by
+        inconsistent effects or interference
+
+    literal_mutexes : dict
+        Mapping from each literal to the literals it is mutex with by negation
+
+    action_index, literal_index : layers.NodeIndex
+        The numbering of the action nodes and the literals, which lets the
+        layers of the graph store their mutexes as bitsets
+    """
+    def __init__(self, problem):
+        no_ops = [make_node(n, no_op=True) for n in chain(*(makeNoOp(s) for s in problem.state_map))]
+        self.action_nodes = no_ops + [make_node(a) for a in problem.actions_list]
+        self.literals = [(s, ~s) for s in problem.state_map]
+
+        # actions may mention literals outside of state_map, and those are numbered as well
+        literal_nodes = dict.fromkeys(chain(*self.literals))
+        self.consumers = defaultdict(list)
+        producers = defaultdict(list)
+        self.free_actions = []
+        for action in self.action_nodes:
+            for literal in action.preconditions:
+                self.consumers[literal].append(action)
+                literal_nodes.setdefault(literal)
+            for literal in action.effects:
+                producers[literal].append(action)
+                literal_nodes.setdefault(literal)
+            if not action.preconditions:
+                self.free_actions.append(action)
+
+        # the tests for these mutexes only look at the nodes themselves, never at a layer
+        action_layer, literal_layer = ActionLayer(), LiteralLayer()
+        self.action_mutexes = defaultdict(set)
+        for actionA, actionB in combinations(self.action_nodes, 2):
+            if (action_layer._inconsistent_effects(actionA, actionB)
+                    or action_layer._interference(actionA, actionB)):
+                self.action_mutexes[actionA].add(actionB)
+                self.action_mutexes[actionB].add(actionA)
+        self.literal_mutexes = defaultdict(set)
+        for literalA, literalB in combinations(literal_nodes, 2):
+            if literal_layer._negation(literalA, literalB):
+                self.literal_mutexes[literalA].add(literalB)
+                self.literal_mutexes[literalB].add(literalA)
+
+        self.action_index = NodeIndex(self.action_nodes, self.action_mutexes)
+        self.literal_index = NodeIndex(literal_nodes, self.literal_mutexes)
+        self.action_index.link(self.literal_index, lambda a: a.preconditions, lambda a: a.effects)
+        self.literal_index.link(self.action_index, producers.__getitem__, self.consumers.__getitem__)
+
+
 class PlanningGraph:
-    def __init__(self, problem, state, serialize=True, ignore_mutexes=False):
+    def __init__(self, problem, state, serialize=True, ignore_mutexes=False, skeleton=None):
         """
         Parameters
         ----------
         problem : PlanningProblem
             An instance of the PlanningProblem class
 
-        state : tuple(bool)
+        state : tuple(bool) or int
             An ordered sequence of True/False values indicating the literal value
-            of the corresponding fluent in problem.state_map
+            of the corresponding fluent in problem.state_map, or the same values
+            encoded as a bitset (see _utils.encode_bitset)
 
         serialize : bool
             Flag indicating whether to serialize non-persistence actions. Actions
             should NOT be serialized for regression search (e.g., GraphPlan), and
             _should_ be serialized if the planning graph is being used to estimate
             a heuristic
+
+        skeleton : PlanningGraphSkeleton
+            The skeleton of the problem's planning graphs; pass the same one to
+            every graph built for a problem to avoid rebuilding it. A new one is
+            built if None
         """
         self._serialize = serialize
         self._is_leveled = False
         self._ignore_mutexes = ignore_mutexes
         self.goal = set(problem.goal)
 
-        # make no-op actions that persist every literal to the next layer
-        no_ops = [make_node(n, no_op=True) for n in chain(*(makeNoOp(s) for s in problem.state_map))]
-        self._actionNodes = no_ops + [make_node(a) for a in problem.actions_list]
+        if skeleton is None:
+            skeleton = PlanningGraphSkeleton(problem)
+        self._skeleton = skeleton
+        # no-op actions persist every literal to the next layer
+        self._actionNodes = skeleton.action_nodes
 
         # initialize the planning graph by finding the literals that are in the
         # first layer and finding the actions they they should be connected to
-        literals = [s if f else ~s for f, s in zip(state, problem.state_map)]
-        layer = LiteralLayer(literals, ActionLayer(), self._ignore_mutexes)
+        if isinstance(state, int):
+            state = bitset_to_tuple(state, problem.state_map)
+        literals = [pos if f else neg for f, (pos, neg) in zip(state, skeleton.literals)]
+        layer = LiteralLayer(literals, ActionLayer(index=skeleton.action_index),
+                             self._ignore_mutexes, skeleton.literal_index)
         layer.update_mutexes()
         self.literal_layers = [layer]
         self.action_layers = []
+        # the literals that were added in the last layer
+        self._new_literals = set(literals)
 
     def h_levelsum(self):
         """ Calculate the level sum heuristic for the planning graph
@@ -275,7 +365,13 @@ class PlanningGraph:
         action_layer = ActionLayer(parent_actions, parent_literals, self._serialize, self._ignore_mutexes)
         literal_layer = LiteralLayer(parent_literals, action_layer, self._ignore_mutexes)
 
-        for action in self._actionNodes:
+        # an action that is not in the parent layer can only have become possible
+        # if one of its preconditions is a literal that is new in the parent layer
+        candidates = set() if self.action_layers else set(self._skeleton.free_actions)
+        for literal in self._new_literals:
+            candidates.update(self._skeleton.consumers.get(literal, ()))
+
+        for action in candidates:
             # actions in the parent layer are skipped because are added monotonically to planning graphs,
             # which is performed automatically in the ActionLayer and LiteralLayer constructors
             if action not in parent_actions and action.preconditions <= parent_literals:
@@ -294,4 +390,5 @@ class PlanningGraph:
         literal_layer.update_mutexes()
         self.action_layers.append(action_layer)
         self.literal_layers.append(literal_layer)
+        self._new_literals = set(literal_layer) - set(parent_literals)
         self._is_leveled = literal_layer == action_layer.parent_layer
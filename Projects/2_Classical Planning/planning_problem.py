@@ -1,33 +1,155 @@
 
-from functools import lru_cache
+from functools import lru_cache, partial, wraps
+from itertools import chain
 
 from aimacode.logic import PropKB
 from aimacode.search import Node, Problem
 
-from _utils import encode_state, decode_state
-from my_planning_graph import PlanningGraph
+from _utils import HeuristicCache, encode_state, decode_state, encode_bitset, bitset_to_tuple, fluent_mask
+from my_planning_graph import PlanningGraph, PlanningGraphSkeleton
+from relaxed_graph import RelaxedPlanningGraph
+from successor_generator import SuccessorGenerator
 
     ##############################################################################
     #                 YOU DO NOT NEED TO MODIFY CODE IN THIS FILE                #
     ##############################################################################
 
 
+DECODE_CACHE_SIZE = 4096
+HEURISTIC_CACHE_SIZE = 100000
+
+
+def cached_heuristic(heuristic):
+    """ Cache the values of a heuristic method in the problem's heuristic_cache
+
+    Values are keyed by the heuristic's name and the node's encoded state, so
+    every node that reaches a state shares one value.
+    """
+    name = heuristic.__name__
+
+    @wraps(heuristic)
+    def wrapper(self, node):
+        return self.heuristic_cache.get((name, node.state), lambda: heuristic(self, node))
+    return wrapper
+
+
 class BasePlanningProblem(Problem):
-    def __init__(self, initial, goal):
-        self.state_map = sorted(initial.pos + initial.neg, key=str)
+    def __init__(self, initial, goal, bitset=False):
+        """
+        Parameters
+        ----------
+        initial : FluentState
+            The initial problem state
+
+        goal : iterable
+            A collection of literal fluents describing the goal state
+
+        bitset : bool
+            Flag indicating whether states are encoded as an integer with one
+            bit per fluent of state_map, the first fluent being the most
+            significant bit (see _utils.encode_bitset), instead of a tuple of
+            True/False values
+        """
+        self.state_map = sorted(list(initial.pos) + list(initial.neg), key=str)
+        self.fluent_index = {f: i for i, f in enumerate(self.state_map)}
+        self.goal_mask = fluent_mask(goal, self.fluent_index)
+        self.bitset = bitset
         self.initial_state_TF = encode_state(initial, self.state_map)
-        super().__init__(self.initial_state_TF, goal=goal)
+        initial_state = encode_bitset(initial, self.fluent_index) if bitset else self.initial_state_TF
+        super().__init__(initial_state, goal=goal)
+        self._action_masks = None
+        self._successors = None
+        self._skeleton = None
+        self._relaxed = None
+        self._decode = lru_cache(maxsize=DECODE_CACHE_SIZE)(partial(decode_state, fluent_map=self.state_map))
+        # replace with a HeuristicCache of another size or policy before searching to tune memory use
+        self.heuristic_cache = HeuristicCache(HEURISTIC_CACHE_SIZE)
+
+    def state_tuple(self, state):
+        """ Return a state as the tuple of True/False values for the fluents in state_map """
+        return bitset_to_tuple(state, self.state_map) if self.bitset else state
+
+    def decode(self, state):
+        """ Return a state of this problem as a FrozenFluentState
 
-    @lru_cache()
+        The most recently decoded states are cached, so code that checks
+        preconditions against fluents, e.g., in a custom actions() method,
+        decodes each state once.
+        """
+        return self._decode(state)
+
+    def action_masks(self):
+        """ Return the actions compiled to bitsets over state_map
+
+        The masks are built on first use, because subclasses assign
+        actions_list after calling BasePlanningProblem.__init__. A
+        precondition that is not in state_map can never hold, so it is
+        mapped to the bit just past the last fluent, which no state sets.
+
+        Returns
+        -------
+        dict mapping each action in actions_list to a tuple of masks
+        (precond_pos, precond_neg, effect_add, effect_rem), where each mask
+        has the bits of the fluents in that part of the action set
+        """
+        if self._action_masks is None:
+            self._action_masks = {action: self._compile_action(action) for action in self.actions_list}
+        return self._action_masks
+
+    def successor_generator(self):
+        """ Return the SuccessorGenerator that indexes the preconditions of actions_list
+
+        Like action_masks, the index is built on first use.
+        """
+        if self._successors is None:
+            index = self.fluent_index
+            conditions = []
+            for action in self.actions_list:
+                if all(f in index for f in chain(action.precond_pos, action.precond_neg)):
+                    conditions.append([(index[f], True) for f in action.precond_pos] +
+                                      [(index[f], False) for f in action.precond_neg])
+                else:
+                    conditions.append(None)
+            self._successors = SuccessorGenerator(self.actions_list, conditions, len(self.state_map))
+        return self._successors
+
+    def graph_skeleton(self):
+        """ Return the PlanningGraphSkeleton shared by the planning graphs of this problem
+
+        Like action_masks, the skeleton is built on first use.
+        """
+        if self._skeleton is None:
+            self._skeleton = PlanningGraphSkeleton(self)
+        return self._skeleton
+
+    def relaxed_graph(self):
+        """ Return the RelaxedPlanningGraph used by h_max, h_add and h_ff
+
+        Like action_masks, it is built on first use.
+        """
+        if self._relaxed is None:
+            self._relaxed = RelaxedPlanningGraph(self)
+        return self._relaxed
+
+    def _compile_action(self, action):
+        index = self.fluent_index
+        preconditions = chain(action.precond_pos, action.precond_neg)
+        missing = 1 << len(self.state_map) if any(f not in index for f in preconditions) else 0
+        return (fluent_mask(action.precond_pos, index) | missing, fluent_mask(action.precond_neg, index),
+                fluent_mask(action.effect_add, index), fluent_mask(action.effect_rem, index))
+
+    @cached_heuristic
     def h_unmet_goals(self, node):
         """ This heuristic estimates the minimum number of actions that must be
         carried out from the current state in order to satisfy all of the goal
         conditions by ignoring the preconditions required for an action to be
         executed.
         """
+        if self.bitset:
+            return bin(self.goal_mask & ~node.state).count('1')
         return sum(1 for i, f in enumerate(self.state_map) if not node.state[i] and f in self.goal)
 
-    @lru_cache()
+    @cached_heuristic
     def h_pg_levelsum(self, node):
         """ This heuristic uses a planning graph representation of the problem
         state space to estimate the sum of the number of actions that must be
@@ -38,11 +160,11 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
+        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True, skeleton=self.graph_skeleton())
         score = pg.h_levelsum()
         return score
 
-    @lru_cache()
+    @cached_heuristic
     def h_pg_maxlevel(self, node):
         """ This heuristic uses a planning graph representation of the problem
         to estimate the maximum level cost out of all the individual goal literals.
@@ -53,11 +175,11 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
+        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True, skeleton=self.graph_skeleton())
         score = pg.h_maxlevel()
         return score
 
-    @lru_cache()
+    @cached_heuristic
     def h_pg_setlevel(self, node):
         """ This heuristic uses a planning graph representation of the problem
         to estimate the level cost in the planning graph to achieve all of the
@@ -67,32 +189,65 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True)
+        pg = PlanningGraph(self, node.state, serialize=True, skeleton=self.graph_skeleton())
         score = pg.h_setlevel()
         return score
 
+    @cached_heuristic
+    def h_max(self, node):
+        """ This heuristic estimates the cost of the goal as the largest number of
+        levels of a relaxed planning graph needed to reach any single goal
+        literal, which equals h_pg_maxlevel. It is computed by propagating
+        costs over the actions' preconditions instead of building the graph.
+
+        See Also
+        --------
+        relaxed_graph.RelaxedPlanningGraph.h_max
+        """
+        return self.relaxed_graph().h_max(node.state)
+
+    @cached_heuristic
+    def h_add(self, node):
+        """ This heuristic estimates the cost of the goal as the sum of the costs
+        of reaching each goal literal when delete effects are ignored, where
+        the cost of an action is one more than the sum of the costs of its
+        preconditions. It is not admissible.
+
+        See Also
+        --------
+        relaxed_graph.RelaxedPlanningGraph.h_add
+        """
+        return self.relaxed_graph().h_add(node.state)
+
+    @cached_heuristic
+    def h_ff(self, node):
+        """ This heuristic counts the actions of a plan that reaches the goal when
+        delete effects are ignored (the FF heuristic). It is not admissible,
+        but it is usually more accurate than h_add because actions shared by
+        several goals are only counted once.
+
+        See Also
+        --------
+        relaxed_graph.RelaxedPlanningGraph.h_ff
+        """
+        return self.relaxed_graph().h_ff(node.state)
+
     def actions(self, state):
-        """ Return the actions that can be executed in the given state. """
-        possible_actions = []
-        fluent = decode_state(state, self.state_map)
-        for action in self.actions_list:
-            is_possible = True
-            for clause in action.precond_pos:
-                if clause not in fluent.pos:
-                    is_possible = False
-                    break
-            if not is_possible: continue
-            for clause in action.precond_neg:
-                if clause not in fluent.neg:
-                    is_possible = False
-                    break
-            if is_possible: possible_actions.append(action)
-        return possible_actions
+        """ Return the actions that can be executed in the given state.
+
+        The actions are looked up in successor_generator(), which handles both
+        state encodings and returns them in the order of actions_list.
+        """
+        return self.successor_generator().applicable(state)
 
     def result(self, state, action):
         """ Return the state that results from executing the given action in the
         given state. The action must be one of self.actions(state).
         """
+        if self.bitset:
+            masks = self.action_masks().get(action)
+            _, _, add, rem = masks if masks is not None else self._compile_action(action)
+            return (state & ~rem) | add
         return tuple([
             (f and s not in action.effect_rem) or (s in action.effect_add)
             for f, s in zip(state, self.state_map)
@@ -100,4 +255,6 @@ class BasePlanningProblem(Problem):
 
     def goal_test(self, state: str) -> bool:
         """ Test the state to see if goal is reached """
+        if self.bitset:
+            return state & self.goal_mask == self.goal_mask
         return all(f for f, c in zip(state, self.state_map) if c in self.goal)
@@ -0,0 +1,147 @@
+""" Delete relaxation heuristics computed by counting satisfied preconditions
+
+The relaxed problem treats every literal (a fluent or its negation) as a fact
+that stays true once reached, which is the problem a planning graph solves
+when mutexes are ignored. Instead of building layers, the cost of reaching
+every literal is found by a Dijkstra-like search: each action keeps a
+counter of its preconditions that have not been reached yet, and when the
+counter drops to zero the action's effects are reached at the cost of its
+preconditions plus one. Each literal and action is handled once per state.
+
+See Also
+--------
+Bonet & Geffner, "Planning as heuristic search" (2001) for h_max and h_add,
+and Hoffmann & Nebel, "The FF planning system" (2001) for the relaxed plan
+heuristic
+"""
+from heapq import heappop, heappush
+from math import inf
+
+
+class RelaxedPlanningGraph:
+    """ The preconditions and effects of a problem's actions over numbered literals
+
+    Literal 2i is the fluent problem.state_map[i] and literal 2i + 1 is its
+    negation.
+
+    Attributes
+    ----------
+    actions : list
+        For each action of problem.actions_list that can ever be applied, a
+        tuple (action, preconditions, effects) of the action and the numbers
+        of its precondition and effect literals
+
+    consumers : list
+        For each literal, the numbers of the actions that have it as a
+        precondition
+
+    goals : tuple
+        The numbers of the goal literals; like goal_test, goals that are not
+        in problem.state_map are ignored
+    """
+    def __init__(self, problem):
+        index = {}
+        for i, fluent in enumerate(problem.state_map):
+            index[fluent] = 2 * i
+            index[~fluent] = 2 * i + 1
+        self.size = len(problem.state_map)
+        self.actions = []
+        self.consumers = [[] for _ in range(2 * self.size)]
+        for action in problem.actions_list:
+            preconditions = list(action.precond_pos) + [~f for f in action.precond_neg]
+            if any(p not in index for p in preconditions):
+                continue
+            effects = list(action.effect_add) + [~f for f in action.effect_rem]
+            numbers = tuple(sorted(set(index[p] for p in preconditions)))
+            for literal in numbers:
+                self.consumers[literal].append(len(self.actions))
+            self.actions.append((action, numbers, tuple(index[e] for e in effects if e in index)))
+        self.goals = tuple(sorted(set(index[g] for g in problem.goal if g in index)))
+
+    def literals(self, state):
+        """ Return the numbers of the literals that hold in a tuple or bitset state """
+        if isinstance(state, int):
+            last = self.size - 1
+            return [2 * i + (0 if state >> (last - i) & 1 else 1) for i in range(self.size)]
+        return [2 * i + (0 if value else 1) for i, value in enumerate(state)]
+
+    def costs(self, state, combine):
+        """ Return the relaxed cost of reaching each literal from a state
+
+        Parameters
+        ----------
+        state : tuple(bool) or int
+            The state to start from
+
+        combine : callable
+            Function mapping the costs of the preconditions of an action to
+            the cost of applying it, e.g., max for h_max and sum for h_add
+
+        Returns
+        -------
+        The list of costs per literal (inf for unreachable literals, and
+        possibly for literals that are not needed to reach the goals, since
+        the search stops once every goal is reached), and the list of the
+        action that first reached each literal at its cost (None for the
+        literals of the state and the unreachable ones)
+        """
+        cost = [inf] * (2 * self.size)
+        supporter = [None] * (2 * self.size)
+        waiting = [len(pre) for _, pre, _ in self.actions]
+        queue = []
+        for literal in self.literals(state):
+            cost[literal] = 0
+            queue.append((0, literal))
+        for number, (_, pre, _) in enumerate(self.actions):
+            if not pre:
+                self._apply(number, 1, cost, supporter, queue)
+
+        goals = set(self.goals)
+        while queue and goals:
+            value, literal = heappop(queue)
+            if value > cost[literal]:
+                continue
+            goals.discard(literal)
+            for number in self.consumers[literal]:
+                waiting[number] -= 1
+                if not waiting[number]:
+                    pre = self.actions[number][1]
+                    self._apply(number, combine([cost[p] for p in pre]) + 1, cost, supporter, queue)
+        return cost, supporter
+
+    def _apply(self, number, value, cost, supporter, queue):
+        for literal in self.actions[number][2]:
+            if value < cost[literal]:
+                cost[literal] = value
+                supporter[literal] = number
+                heappush(queue, (value, literal))
+
+    def h_max(self, state):
+        """ Return the largest relaxed cost of any goal, where an action costs one
+        more than its most expensive precondition """
+        cost, _ = self.costs(state, max)
+        return max([cost[g] for g in self.goals], default=0)
+
+    def h_add(self, state):
+        """ Return the sum of the relaxed costs of the goals, where an action costs
+        one more than the sum of the costs of its preconditions """
+        cost, _ = self.costs(state, sum)
+        return sum([cost[g] for g in self.goals])
+
+    def h_ff(self, state):
+        """ Return the number of actions of a relaxed plan that reaches every goal
+
+        The plan is extracted backwards from the goals, reaching each literal
+        with the action that first reached it under h_add costs.
+        """
+        cost, supporter = self.costs(state, sum)
+        if any(cost[g] == inf for g in self.goals):
+            return inf
+        plan = set()
+        stack = list(self.goals)
+        while stack:
+            number = supporter[stack.pop()]
+            if number is not None and number not in plan:
+                plan.add(number)
+                stack.extend(self.actions[number][1])
+        return len(plan)
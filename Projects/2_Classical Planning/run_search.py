@@ -7,7 +7,8 @@ from aimacode.search import (breadth_first_search, astar_search,
     recursive_best_first_search)
 from air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3, air_cargo_p4
 
-from _utils import run_search
+from _utils import HeuristicCache, run_search
+from planning_problem import HEURISTIC_CACHE_SIZE
 
     ##############################################################################
     #                 YOU DO NOT NEED TO MODIFY CODE IN THIS FILE                #
@@ -44,7 +45,11 @@ SEARCHES = [["breadth_first_search", breadth_first_search, ""],
             ['astar_search', astar_search, 'h_unmet_goals'],
             ['astar_search', astar_search, 'h_pg_levelsum'],
             ['astar_search', astar_search, 'h_pg_maxlevel'],
-            ['astar_search', astar_search, 'h_pg_setlevel']
+            ['astar_search', astar_search, 'h_pg_setlevel'],
+            ['greedy_best_first_graph_search', greedy_best_first_graph_search, 'h_ff'],
+            ['astar_search', astar_search, 'h_max'],
+            ['astar_search', astar_search, 'h_add'],
+            ['astar_search', astar_search, 'h_ff']
             ]
 
 
@@ -66,7 +71,7 @@ def manual():
         __file__, " ".join(p_choices), " ".join(s_choices)))
 
 
-def main(p_choices, s_choices):
+def main(p_choices, s_choices, bitset=False, cache_size=HEURISTIC_CACHE_SIZE, cache_policy='lru'):
     problems = [PROBLEMS[i-1] for i in map(int, p_choices)]
     searches = [SEARCHES[i-1] for i in map(int, s_choices)]
 
@@ -75,7 +80,8 @@ def main(p_choices, s_choices):
             hstring = heuristic if not heuristic else " with {}".format(heuristic)
             print("\nSolving {} using {}{}...".format(pname, sname, hstring))
 
-            problem_instance = problem_fn()
+            problem_instance = problem_fn(bitset)
+            problem_instance.heuristic_cache = HeuristicCache(cache_size, cache_policy)
             heuristic_fn = None if not heuristic else getattr(problem_instance, heuristic)
             run_search(problem_instance, search_fn, heuristic_fn)
 
@@ -90,12 +96,19 @@ if __name__=="__main__":
                         help="Specify the indices of the problems to solve as a list of space separated values. Choose from: {!s}".format(list(range(1, len(PROBLEMS)+1))))
     parser.add_argument('-s', '--searches', nargs="+", choices=range(1, len(SEARCHES)+1), type=int, metavar='',
                         help="Specify the indices of the search algorithms to use as a list of space separated values. Choose from: {!s}".format(list(range(1, len(SEARCHES)+1))))
+    parser.add_argument('-b', '--bitset', action="store_true",
+                        help="Encode states as integer bitsets, which makes expanding nodes faster.")
+    parser.add_argument('-c', '--cache-size', type=int, default=HEURISTIC_CACHE_SIZE,
+                        help="The number of heuristic values cached per search (0 disables the cache). Default: {}".format(HEURISTIC_CACHE_SIZE))
+    parser.add_argument('--cache-policy', choices=HeuristicCache.POLICIES, default='lru',
+                        help="Evict the least recently used ('lru') or the oldest ('fifo') heuristic value when the cache is full.")
     args = parser.parse_args()
 
     if args.manual:
         manual()
     elif args.problems and args.searches:
-        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))))
+        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))), args.bitset,
+             args.cache_size, args.cache_policy)
     else:
         print()
         parser.print_help()
@@ -0,0 +1,105 @@
+""" A decision tree over fluents that finds the actions applicable in a state
+
+The tree is built as in the successor generator of the Fast Downward planner.
+Each inner node tests one fluent: the actions that need the fluent to be True
+are stored below one child, the actions that need it to be False below a
+second child, and the actions that do not mention it below a third child.
+Actions are stored at the node where all of their preconditions have been
+tested. Looking up a state only follows the children that agree with it, so
+the work grows with the number of applicable actions and the depth of the
+tree rather than with the size of the whole action list.
+"""
+
+
+class SuccessorGenerator:
+    """ Index of the preconditions of a list of actions
+
+    Attributes
+    ----------
+    actions : list
+        The actions in the order they were given; `applicable` returns
+        actions in this order
+
+    root : tuple or None
+        The root of the tree; see `_build`
+    """
+    def __init__(self, actions, conditions, size):
+        """
+        Parameters
+        ----------
+        actions : list
+            The actions to index
+
+        conditions : list
+            For each action, a collection of (index, value) pairs meaning
+            that the fluent with that index must have that True/False value
+            for the action to apply. None marks an action that never applies
+
+        size : int
+            The number of fluents of a state; in a bitset state, the fluent
+            with index i is bit ``size - 1 - i`` (see _utils.encode_bitset)
+        """
+        self.actions = list(actions)
+        self.size = size
+        entries = [(tuple(sorted(set(cond))), i) for i, cond in enumerate(conditions) if cond is not None]
+        self.root = self._build(entries)
+
+    def _build(self, entries):
+        """ Return the node for a list of (untested conditions, action index) pairs
+
+        A node is a tuple (fluent, bit, true_child, false_child,
+        dont_care_child, indices), where `bit` is the fluent's bit and
+        `indices` are the actions with no conditions left. The children of
+        a leaf are None, and so is the node of an empty list; the fluent of
+        a leaf is never tested.
+
+        The chain of don't care children can be as long as the number of
+        fluents, so it is built in a loop; only the tested branches recurse,
+        and they are at most as deep as the longest list of conditions.
+        """
+        if not entries:
+            return None
+        done = tuple(i for cond, i in entries if not cond)
+        # conditions are sorted, so the chain tests the first fluent of each action's
+        # conditions in increasing order, and an action is stored below the node that
+        # tests its first fluent
+        groups = {}
+        for cond, i in entries:
+            if cond:
+                groups.setdefault(cond[0][0], []).append((cond, i))
+        if not groups:
+            return (0, 1, None, None, None, done)
+        fluents = sorted(groups)
+        node = None
+        for fluent in reversed(fluents):
+            true = [(cond[1:], i) for cond, i in groups[fluent] if cond[0][1]]
+            false = [(cond[1:], i) for cond, i in groups[fluent] if not cond[0][1]]
+            node = (fluent, 1 << (self.size - 1 - fluent), self._build(true), self._build(false), node,
+                    done if fluent == fluents[0] else ())
+        return node
+
+    def applicable(self, state):
+        """ Return the actions whose conditions hold in a state
+
+        Parameters
+        ----------
+        state : tuple(bool) or int
+            An ordered sequence of True/False values for each fluent, or the
+            same values encoded as a bitset (see _utils.encode_bitset)
+        """
+        bitset = isinstance(state, int)
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            # follow the chain of don't care children directly and only stack the tested branches
+            while node is not None:
+                fluent, bit, true, false, node, indices = node
+                if indices:
+                    found.extend(indices)
+                child = true if ((state & bit) if bitset else state[fluent]) else false
+                if child is not None:
+                    stack.append(child)
+        found.sort()
+        actions = self.actions
+        return [actions[i] for i in found]
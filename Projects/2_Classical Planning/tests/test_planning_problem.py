@@ -0,0 +1,201 @@
+import unittest
+
+from aimacode.search import InstrumentedProblem, Node, astar_search, breadth_first_search
+from aimacode.utils import expr
+
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from example_have_cake import have_cake
+from my_planning_graph import ActionLayer, LiteralLayer, PlanningGraph
+from successor_generator import SuccessorGenerator
+from _utils import FrozenFluentState, HeuristicCache, decode_state
+
+
+class Test_BitsetStates(unittest.TestCase):
+    def setUp(self):
+        self.problems = [(have_cake(), have_cake(bitset=True)),
+                         (air_cargo_p1(), air_cargo_p1(bitset=True))]
+
+    def test_initial_state(self):
+        for problem, bitset_problem in self.problems:
+            self.assertIsInstance(bitset_problem.initial, int)
+            self.assertEqual(bitset_problem.state_tuple(bitset_problem.initial), problem.initial)
+
+    def test_successors_match_tuple_states(self):
+        for problem, bitset_problem in self.problems:
+            frontier = [(problem.initial, bitset_problem.initial)]
+            seen = set()
+            while frontier:
+                state, bits = frontier.pop()
+                if state in seen:
+                    continue
+                seen.add(state)
+                self.assertEqual(bitset_problem.state_tuple(bits), state)
+                self.assertEqual(problem.goal_test(state), bitset_problem.goal_test(bits))
+                actions = problem.actions(state)
+                self.assertEqual([str(a) for a in actions], [str(a) for a in bitset_problem.actions(bits)])
+                frontier.extend((problem.result(state, a), bitset_problem.result(bits, a)) for a in actions)
+
+    def test_heuristics(self):
+        for problem, bitset_problem in self.problems:
+            for name in ('h_unmet_goals', 'h_pg_levelsum', 'h_pg_maxlevel', 'h_pg_setlevel'):
+                self.assertEqual(getattr(problem, name)(Node(problem.initial)),
+                                 getattr(bitset_problem, name)(Node(bitset_problem.initial)), name)
+
+    def test_search(self):
+        problem = air_cargo_p1(bitset=True)
+        self.assertEqual(len(breadth_first_search(problem).solution()), 6)
+
+    def test_astar_expands_same_nodes(self):
+        # A* breaks ties between nodes by comparing their states
+        for problem_fn, heuristic in ((air_cargo_p1, 'h_unmet_goals'), (air_cargo_p1, 'h_pg_levelsum'),
+                                      (air_cargo_p2, 'h_ff')):
+            counts = []
+            for bitset in (False, True):
+                ip = InstrumentedProblem(problem_fn(bitset))
+                astar_search(ip, getattr(ip.problem, heuristic))
+                counts.append((ip.succs, ip.goal_tests, ip.states))
+            self.assertEqual(counts[0], counts[1], heuristic)
+
+
+class Test_SuccessorGenerator(unittest.TestCase):
+    def test_applicable(self):
+        conditions = [[(0, True)], [(2, False), (0, True)], [], None, [(1, True), (2, True)], [(2, False)]]
+        generator = SuccessorGenerator('abcdef', conditions, 3)
+        for bits in range(8):
+            state = tuple(bool(bits >> (2 - i) & 1) for i in range(3))
+            expected = [name for name, cond in zip('abcdef', conditions)
+                        if cond is not None and all(state[i] == value for i, value in cond)]
+            self.assertEqual(generator.applicable(state), expected)
+            self.assertEqual(generator.applicable(bits), expected)
+
+    def test_many_fluents(self):
+        # every action tests a different fluent, which makes a long chain of don't care nodes
+        size = 3000
+        conditions = [[(i, i % 2 == 0)] for i in range(size)]
+        generator = SuccessorGenerator(range(size), conditions, size)
+        state = tuple(i % 3 == 0 for i in range(size))
+        expected = [i for i in range(size) if state[i] == (i % 2 == 0)]
+        self.assertEqual(generator.applicable(state), expected)
+        self.assertEqual(generator.applicable(int(''.join('1' if v else '0' for v in state), 2)), expected)
+
+
+class Test_DecodeState(unittest.TestCase):
+    def test_frozen_fluents(self):
+        problem = have_cake()
+        fs = decode_state(problem.initial, problem.state_map)
+        self.assertIsInstance(fs, FrozenFluentState)
+        self.assertEqual(fs.pos, {expr('Have(Cake)')})
+        self.assertEqual(fs.neg, {expr('Eaten(Cake)')})
+        self.assertEqual(fs, decode_state(have_cake(bitset=True).initial, problem.state_map))
+        self.assertEqual(hash(fs), hash(problem.decode(problem.initial)))
+        self.assertIs(problem.decode(problem.initial), problem.decode(problem.initial))
+
+    def test_precondition_checks(self):
+        # the way a custom actions() method checks preconditions against decoded fluents
+        for problem in (have_cake(), air_cargo_p1(bitset=True)):
+            state = problem.initial
+            for _ in range(4):
+                fs = problem.decode(state)
+                actions = [a for a in problem.actions_list
+                           if all(c in fs.pos for c in a.precond_pos) and all(c in fs.neg for c in a.precond_neg)]
+                self.assertEqual(actions, problem.actions(state))
+                state = problem.result(state, actions[-1])
+
+
+class Test_GraphSkeleton(unittest.TestCase):
+    def test_shared_skeleton(self):
+        problem = air_cargo_p1()
+        skeleton = problem.graph_skeleton()
+        self.assertIs(problem.graph_skeleton(), skeleton)
+        state = problem.initial
+        for action in problem.actions(problem.initial)[:3]:
+            state = problem.result(state, action)
+            shared = PlanningGraph(problem, state, skeleton=skeleton).fill()
+            fresh = PlanningGraph(problem, state).fill()
+            self.assertIs(shared._actionNodes, skeleton.action_nodes)
+            self.assertEqual(shared.literal_layers, fresh.literal_layers)
+            self.assertEqual(shared.action_layers, fresh.action_layers)
+            self.assertEqual(problem.h_pg_setlevel(Node(state)), PlanningGraph(problem, state).h_setlevel())
+
+    def test_bitset_mutexes_match_pairwise(self):
+        problem = air_cargo_p1()
+        for serialize in (True, False):
+            pg = PlanningGraph(problem, problem.initial, serialize).fill()
+            for layer in pg.action_layers:
+                pairwise = ActionLayer(list(layer), layer.parent_layer, serialize)
+                pairwise.update_mutexes()
+                self.assertEqual(pairwise._mutexes, layer._mutexes)
+            for layer in pg.literal_layers:
+                pairwise = LiteralLayer(list(layer), layer.parent_layer)
+                for literal in layer:
+                    for action in layer.parents[literal]:
+                        pairwise.add_inbound_edges(action, [literal])
+                pairwise.update_mutexes()
+                self.assertEqual(pairwise._mutexes, layer._mutexes)
+            self.assertTrue(pg.literal_layers[-1]._mutexes)
+
+    def test_shared_edges(self):
+        problem = air_cargo_p1()
+        pg = PlanningGraph(problem, problem.initial).fill()
+        first = pg.literal_layers[0]
+        self.assertEqual(len(first.parents), 0)
+        for layer in pg.literal_layers[1:]:
+            self.assertIs(layer._parent_edges, first._parent_edges)
+            for literal in layer:
+                self.assertEqual(layer.parents[literal],
+                                 set(a for a in layer.parent_layer if literal in a.effects))
+
+
+class Test_RelaxedHeuristics(unittest.TestCase):
+    def test_h_max_matches_maxlevel(self):
+        for problem in (have_cake(), air_cargo_p1(), air_cargo_p2()):
+            state = problem.initial
+            for _ in range(3):
+                node = Node(state)
+                self.assertEqual(problem.h_max(node), problem.h_pg_maxlevel(node))
+                state = problem.result(state, problem.actions(state)[0])
+
+    def test_values(self):
+        for bitset in (False, True):
+            problem = air_cargo_p1(bitset)
+            node = Node(problem.initial)
+            self.assertEqual((problem.h_max(node), problem.h_add(node), problem.h_ff(node)), (2, 6, 6))
+            goal = breadth_first_search(problem)
+            self.assertEqual((problem.h_max(goal), problem.h_add(goal), problem.h_ff(goal)), (0, 0, 0))
+
+    def test_negative_preconditions(self):
+        problem = have_cake()
+        eat, bake = problem.actions_list
+        # Bake needs ~Have(Cake), which only holds after Eat
+        state = problem.result(problem.initial, eat)
+        self.assertEqual([problem.h_max(Node(state)), problem.h_ff(Node(state))], [1, 1])
+        self.assertEqual(problem.h_ff(Node(problem.initial)), 1)
+
+
+class Test_HeuristicCache(unittest.TestCase):
+    def test_eviction(self):
+        for policy, kept in (('lru', ['a', 'c']), ('fifo', ['b', 'c'])):
+            cache = HeuristicCache(2, policy)
+            for key in 'abac':
+                cache.get(key, lambda: key.upper())
+            self.assertEqual(list(cache.values), kept)
+            self.assertEqual((cache.hits, cache.misses, cache.evictions), (1, 3, 1))
+        disabled = HeuristicCache(0)
+        self.assertEqual([disabled.get('a', lambda: 1) for _ in range(2)], [1, 1])
+        self.assertEqual((len(disabled), disabled.misses), (0, 2))
+        self.assertRaises(ValueError, HeuristicCache, 2, 'random')
+
+    def test_keyed_by_state(self):
+        for bitset in (False, True):
+            problem = air_cargo_p1(bitset)
+            value = problem.h_pg_levelsum(Node(problem.initial))
+            self.assertEqual(problem.h_pg_levelsum(Node(problem.initial)), value)
+            problem.h_unmet_goals(Node(problem.initial))
+            cache = problem.heuristic_cache
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+            self.assertEqual(set(cache.values), {('h_pg_levelsum', problem.initial),
+                                                 ('h_unmet_goals', problem.initial)})
+
+
+if __name__ == '__main__':
+    unittest.main()